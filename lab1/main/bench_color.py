@@ -0,0 +1,60 @@
+import argparse
+import sys
+import time
+
+import numpy as np
+
+import color_batch
+import colorconv
+from main import ColorConverterApp
+
+
+def best_time(func, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Скалярные и векторные преобразования цвета")
+    parser.add_argument("-n", "--count", type=int, default=200_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(0)
+    rgb = rng.integers(0, 256, size=(args.count, 3), dtype=np.uint8)
+    cmyk = color_batch.rgb_to_cmyk(rgb)
+    rgb_list = rgb.tolist()
+    cmyk_list = cmyk.tolist()
+
+    cases = [
+        ("rgb->cmyk", lambda: [ColorConverterApp._rgb_to_cmyk(*c) for c in rgb_list],
+         lambda: color_batch.rgb_to_cmyk(rgb)),
+        ("cmyk->rgb", lambda: [ColorConverterApp._cmyk_to_rgb(*c) for c in cmyk_list],
+         lambda: color_batch.cmyk_to_rgb(cmyk)),
+        ("rgb->xyz", lambda: [ColorConverterApp._rgb_to_xyz(*c) for c in rgb_list],
+         lambda: color_batch.rgb_to_xyz(rgb)),
+        ("rgb->lab", lambda: [colorconv.rgb_to_lab(*c) for c in rgb_list],
+         lambda: color_batch.rgb_to_lab(rgb)),
+        ("cmyk->lch", lambda: [colorconv.convert("cmyk", "lch", *c)[0] for c in cmyk_list],
+         lambda: color_batch.convert(cmyk, "cmyk", "lch")[0]),
+    ]
+
+    print(f"{'conversion':<12} {'scalar, s':>10} {'batch, s':>10} {'speedup':>9}")
+    for name, scalar, batch in cases:
+        scalar_time = best_time(scalar, args.repeat)
+        batch_time = best_time(batch, args.repeat)
+        print(f"{name:<12} {scalar_time:>10.4f} {batch_time:>10.4f} {scalar_time / batch_time:>8.0f}x")
+
+        expected = np.array(scalar())
+        if not np.allclose(expected, batch(), atol=1e-6):
+            print(f"  расхождение с исходной формулой в {name}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
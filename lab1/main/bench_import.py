@@ -0,0 +1,46 @@
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+CASES = [
+    ("python", ["-c", "pass"]),
+    ("import colorconv", ["-c", "import colorconv"]),
+    ("colorconv rgb2cmyk", [os.path.join(HERE, "colorconv.py"), "rgb2cmyk", "255", "0", "0"]),
+    ("import color_batch", ["-c", "import color_batch"]),
+    ("import main (tk)", ["-c", "import main"]),
+]
+
+
+def run_times(args, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable] + args, cwd=HERE, check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Время запуска интерпретатора и импорта модулей lab1")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    print(f"{'case':<22} {'median, ms':>11} {'min, ms':>9}")
+    for name, case_args in CASES:
+        try:
+            times = run_times(case_args, args.repeat)
+        except subprocess.CalledProcessError:
+            print(f"{name:<22} {'ошибка':>11}")
+            continue
+        print(f"{name:<22} {statistics.median(times) * 1000:>11.1f} {min(times) * 1000:>9.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,50 @@
+import argparse
+import sys
+import time
+
+import numpy as np
+
+import color_batch
+from palette_index import PaletteIndex
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Поиск ближайшего цвета палитры: индекс против полного перебора")
+    parser.add_argument("-p", "--palette", type=int, default=10_000, help="размер палитры")
+    parser.add_argument("-n", "--count", type=int, default=1_000_000, help="число пикселей")
+    parser.add_argument("--brute", type=int, default=50_000, help="сколько пикселей проверить перебором")
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(0)
+    palette = rng.integers(0, 256, size=(args.palette, 3), dtype=np.uint8)
+    pixels = rng.integers(0, 256, size=(args.count, 3), dtype=np.uint8)
+    pixels_lab = color_batch.rgb_to_lab(pixels)
+
+    index, build_time = timed(lambda: PaletteIndex(palette))
+    (_, distances), query_time = timed(lambda: index.query_lab(pixels_lab))
+    _, unique_time = timed(lambda: index.query(pixels))
+
+    sample = min(args.brute, args.count)
+    (_, brute_distances), brute_time = timed(lambda: color_batch.nearest_colors(pixels_lab[:sample], index.lab))
+    brute_time *= args.count / sample
+
+    print(f"палитра {args.palette}, пикселей {args.count}, ячейка {index.cell:.2f}, сетка {'x'.join(map(str, index.dims))}")
+    print(f"{'построение индекса':<28} {build_time:>9.3f} с")
+    print(f"{'индекс':<28} {query_time:>9.3f} с")
+    print(f"{'индекс + уникальные цвета':<28} {unique_time:>9.3f} с")
+    print(f"{'перебор (оценка)':<28} {brute_time:>9.3f} с  {brute_time / query_time:>6.0f}x")
+
+    if not np.allclose(distances[:sample], brute_distances, atol=1e-6):
+        print("  результат индекса расходится с перебором", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
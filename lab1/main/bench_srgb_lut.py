@@ -0,0 +1,75 @@
+import argparse
+import sys
+import time
+
+import numpy as np
+
+import color_batch
+import srgb_lut
+
+
+def best_time(func, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Таблицы sRGB против точных формул: точность и скорость")
+    parser.add_argument("-n", "--count", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(0)
+    unit = rng.random(args.count)
+    bytes_ = rng.integers(0, 256, size=args.count, dtype=np.uint8)
+    unit_list = unit[:args.count // 10].tolist()
+    bytes_list = bytes_[:args.count // 10].tolist()
+
+    dense = np.linspace(0, 1, 1_000_001)
+    lin_error = np.abs(color_batch.linearize_interp(dense) - color_batch.linearize(dense)).max()
+    gamma_error = np.abs(color_batch.correct_gamma_interp(dense) - color_batch.correct_gamma(dense)).max()
+    scalar_lin_error = max(abs(srgb_lut.linearize_interp(v) - srgb_lut.linearize(v)) for v in dense[::10].tolist())
+    scalar_gamma_error = max(abs(srgb_lut.correct_gamma_interp(v) - srgb_lut.correct_gamma(v))
+                             for v in dense[::10].tolist())
+    print(f"Макс. ошибка линеаризации: batch {lin_error:.2e}, scalar {scalar_lin_error:.2e} "
+          f"({lin_error * 255:.4f} из 255)")
+    print(f"Макс. ошибка гамма-коррекции: batch {gamma_error:.2e}, scalar {scalar_gamma_error:.2e} "
+          f"({gamma_error * 255:.4f} из 255)")
+    print()
+
+    cases = [
+        ("scalar linearize 8 bit", len(bytes_list),
+         lambda: [srgb_lut.linearize(v / 255) for v in bytes_list],
+         lambda: [srgb_lut.linearize_8bit(v) for v in bytes_list]),
+        ("scalar linearize", len(unit_list),
+         lambda: [srgb_lut.linearize(v) for v in unit_list],
+         lambda: [srgb_lut.linearize_interp(v) for v in unit_list]),
+        ("scalar gamma", len(unit_list),
+         lambda: [srgb_lut.correct_gamma(v) for v in unit_list],
+         lambda: [srgb_lut.correct_gamma_interp(v) for v in unit_list]),
+        ("batch linearize 8 bit", args.count,
+         lambda: color_batch.linearize(bytes_ / 255),
+         lambda: color_batch.linearize_rgb(bytes_)),
+        ("batch linearize", args.count,
+         lambda: color_batch.linearize(unit),
+         lambda: color_batch.linearize_interp(unit)),
+        ("batch gamma", args.count,
+         lambda: color_batch.correct_gamma(unit),
+         lambda: color_batch.correct_gamma_interp(unit)),
+    ]
+
+    print(f"{'case':<24} {'formula, ns':>12} {'table, ns':>10} {'speedup':>8}")
+    for name, count, formula, table in cases:
+        formula_time = best_time(formula, args.repeat) / count * 1e9
+        table_time = best_time(table, args.repeat) / count * 1e9
+        print(f"{name:<24} {formula_time:>12.1f} {table_time:>10.1f} {formula_time / table_time:>7.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,438 @@
+import numpy as np
+
+import colorconv
+import srgb_lut
+
+RGB_TO_XYZ = np.array([
+    [0.4124564, 0.3575761, 0.1804375],
+    [0.2126729, 0.7151522, 0.0721750],
+    [0.0193339, 0.1191920, 0.9503041],
+])
+
+XYZ_TO_RGB = np.array([
+    [3.2404542, -1.5371385, -0.4985314],
+    [-0.9692660, 1.8760108, 0.0415560],
+    [0.0556434, -0.2040259, 1.0572252],
+])
+
+WHITE_D65 = np.array(colorconv.WHITE_D65)
+# linear RGB <-> XYZ relative to the white point, so Lab needs a single matrix product
+RGB_TO_LAB_XYZ = RGB_TO_XYZ * (100 / WHITE_D65)[:, None]
+LAB_XYZ_TO_RGB = XYZ_TO_RGB * (WHITE_D65 / 100)
+
+# bytes of float64 temporaries one nearest_colors step may keep alive, and about how many
+# rows x palette arrays each metric holds at its peak
+NEAREST_BUDGET = 1 << 26
+NEAREST_TEMPORARIES = {"cie76": 3, "ciede2000": 24}
+
+LINEAR_8BIT_TABLE = np.array(srgb_lut.LINEAR_8BIT)
+LINEAR_TABLE = np.array(srgb_lut.LINEAR_LUT + srgb_lut.LINEAR_LUT[-1:])
+LINEAR_SLOPES = np.diff(LINEAR_TABLE)
+GAMMA_TABLE = np.array(srgb_lut.GAMMA_LUT + srgb_lut.GAMMA_LUT[-1:])
+GAMMA_SLOPES = np.diff(GAMMA_TABLE)
+
+# uint8 RGB is converted through tables in float32. Channels are handled one at a
+# time: (N, 3) by (N, 1) broadcasting runs NumPy's inner loop three elements long.
+_LEVELS = np.arange(256)
+# (max - v) * 100 / max; for max == 0 every difference is 0, so any scale will do
+CMY_SCALE_8BIT = (100 / np.maximum(_LEVELS, 1)).astype(np.float32)
+K_8BIT = ((255 - _LEVELS) * (100 / 255)).astype(np.float32)
+LINEAR_8BIT_TABLE32 = LINEAR_8BIT_TABLE.astype(np.float32)
+RGB_TO_XYZ_100 = RGB_TO_XYZ.T * 100
+RGB_TO_XYZ_100_32 = RGB_TO_XYZ_100.astype(np.float32)
+XYZ_100_TO_RGB = XYZ_TO_RGB.T / 100
+
+
+def _check_channels(array, count, model):
+    if array.ndim == 0 or array.shape[-1] != count:
+        raise ValueError(f"{model}: последняя ось должна иметь размер {count}, получено {array.shape}")
+    return array
+
+
+def _channels(array, count, model):
+    return _check_channels(np.asarray(array, dtype=np.float64), count, model)
+
+
+def linearize(values):
+    values = np.asarray(values, dtype=np.float64)
+    return np.where(values > 0.04045, ((np.maximum(values, 0.04045) + 0.055) / 1.055) ** 2.4, values / 12.92)
+
+
+def correct_gamma(values):
+    values = np.asarray(values, dtype=np.float64)
+    return np.where(values > 0.0031308, 1.055 * np.maximum(values, 0.0031308) ** (1 / 2.4) - 0.055, 12.92 * values)
+
+
+def _interpolate(values, table, slopes):
+    pos = np.clip(values, 0, 1) * (srgb_lut.LUT_SIZE - 1)
+    index = pos.astype(np.intp)
+    pos -= index
+    return table[index] + slopes[index] * pos
+
+
+def linearize_interp(values):
+    values = np.asarray(values, dtype=np.float64)
+    result = _interpolate(values, LINEAR_TABLE, LINEAR_SLOPES)
+    outside = (values < 0) | (values > 1)
+    if outside.any():
+        result[outside] = linearize(values[outside])
+    return result
+
+
+def correct_gamma_interp(values):
+    values = np.asarray(values, dtype=np.float64)
+    result = _interpolate(values, GAMMA_TABLE, GAMMA_SLOPES)
+    outside = (values < 0) | (values > 1)
+    if outside.any():
+        result[outside] = correct_gamma(values[outside])
+    return result
+
+
+def linearize_rgb(rgb):
+    rgb = np.asarray(rgb)
+    if rgb.dtype.kind in "uib":
+        return LINEAR_8BIT_TABLE[np.clip(rgb, 0, 255)]
+    return linearize(rgb / 255)
+
+
+def _rgb8_to_cmyk(rgb):
+    brightest = np.maximum(np.maximum(rgb[..., 0], rgb[..., 1]), rgb[..., 2])
+    scale = CMY_SCALE_8BIT.take(brightest)
+    cmyk = np.empty(rgb.shape[:-1] + (4,), dtype=np.float32)
+    diff = np.empty_like(brightest)
+    for i in range(3):
+        np.subtract(brightest, rgb[..., i], out=diff)
+        np.multiply(diff, scale, out=cmyk[..., i])
+    K_8BIT.take(brightest, out=cmyk[..., 3])
+    return cmyk
+
+
+def rgb_to_cmyk(rgb):
+    rgb = np.asarray(rgb)
+    if rgb.dtype == np.uint8:
+        return _rgb8_to_cmyk(_check_channels(rgb, 3, "RGB"))
+    rgb = _channels(rgb, 3, "RGB")
+    # max over a length-3 axis is much slower than two elementwise maximums
+    brightest = np.maximum(np.maximum(rgb[..., 0], rgb[..., 1]), rgb[..., 2])
+    # (1 - r' - k) / (1 - k) == (max - r) / max, and black gets 0 instead of 0 / 0
+    scale = np.zeros_like(brightest)
+    np.divide(100, brightest, out=scale, where=brightest > 0)
+    cmyk = np.empty(rgb.shape[:-1] + (4,))
+    for i in range(3):
+        np.subtract(brightest, rgb[..., i], out=cmyk[..., i])
+        cmyk[..., i] *= scale
+    np.subtract(255, brightest, out=cmyk[..., 3])
+    cmyk[..., 3] *= 100 / 255
+    return cmyk
+
+
+def cmyk_to_rgb(cmyk):
+    cmyk = _check_channels(np.asarray(cmyk), 4, "CMYK")
+    # the result is float64 for any input; float32 channels are cast inside the ufuncs
+    # instead of being copied first
+    scale = np.subtract(100, cmyk[..., 3], dtype=np.float64)
+    scale *= 255 / 10000
+    rgb = np.empty(cmyk.shape[:-1] + (3,))
+    for i in range(3):
+        np.subtract(100, cmyk[..., i], out=rgb[..., i], dtype=np.float64)
+        rgb[..., i] *= scale
+    return rgb
+
+
+def rgb_to_xyz(rgb):
+    rgb = _check_channels(np.asarray(rgb), 3, "RGB")
+    if rgb.dtype == np.uint8:
+        return LINEAR_8BIT_TABLE32.take(rgb) @ RGB_TO_XYZ_100_32
+    return linearize_rgb(rgb) @ RGB_TO_XYZ_100
+
+
+def xyz_to_rgb(xyz):
+    return _encode_rgb(_channels(xyz, 3, "XYZ") @ XYZ_100_TO_RGB)
+
+
+def cmyk_to_xyz(cmyk):
+    return rgb_to_xyz(cmyk_to_rgb(cmyk))
+
+
+def xyz_to_cmyk(xyz):
+    rgb, out_of_gamut = xyz_to_rgb(xyz)
+    return rgb_to_cmyk(rgb), out_of_gamut
+
+
+def _lab_f(values):
+    return np.where(values > colorconv.LAB_EPSILON, np.cbrt(values),
+                    (colorconv.LAB_KAPPA * values + 16) / 116)
+
+
+def _lab_f_inv(values):
+    cube = values ** 3
+    return np.where(cube > colorconv.LAB_EPSILON, cube, (116 * values - 16) / colorconv.LAB_KAPPA)
+
+
+def _lab(relative_xyz):
+    f = _lab_f(relative_xyz)
+    lab = np.empty_like(f)
+    lab[..., 0] = 116 * f[..., 1] - 16
+    lab[..., 1] = 500 * (f[..., 0] - f[..., 1])
+    lab[..., 2] = 200 * (f[..., 1] - f[..., 2])
+    return lab
+
+
+def _lab_to_relative_xyz(lab):
+    lab = _channels(lab, 3, "Lab")
+    fy = (lab[..., 0] + 16) / 116
+    xyz = np.empty_like(lab)
+    xyz[..., 0] = _lab_f_inv(fy + lab[..., 1] / 500)
+    xyz[..., 1] = np.where(lab[..., 0] > colorconv.LAB_KAPPA * colorconv.LAB_EPSILON, fy ** 3,
+                           lab[..., 0] / colorconv.LAB_KAPPA)
+    xyz[..., 2] = _lab_f_inv(fy - lab[..., 2] / 200)
+    return xyz
+
+
+def _encode_rgb(rgb_linear):
+    out_of_gamut = ((rgb_linear < 0) | (rgb_linear > 1)).any(axis=-1)
+    # the transfer function is monotonic with f(0) = 0 and f(1) = 1, so clamping first is equivalent
+    return correct_gamma(np.clip(rgb_linear, 0, 1)) * 255, out_of_gamut
+
+
+def xyz_to_lab(xyz):
+    return _lab(_channels(xyz, 3, "XYZ") / WHITE_D65)
+
+
+def lab_to_xyz(lab):
+    return _lab_to_relative_xyz(lab) * WHITE_D65
+
+
+def rgb_to_lab(rgb):
+    rgb = _check_channels(np.asarray(rgb), 3, "RGB")
+    return _lab(linearize_rgb(rgb) @ RGB_TO_LAB_XYZ.T)
+
+
+def lab_to_rgb(lab):
+    return _encode_rgb(_lab_to_relative_xyz(lab) @ LAB_XYZ_TO_RGB.T)
+
+
+def cmyk_to_lab(cmyk):
+    return rgb_to_lab(cmyk_to_rgb(cmyk))
+
+
+def lab_to_cmyk(lab):
+    rgb, out_of_gamut = lab_to_rgb(lab)
+    return rgb_to_cmyk(rgb), out_of_gamut
+
+
+def lab_to_lch(lab):
+    lab = _channels(lab, 3, "Lab")
+    lch = np.empty_like(lab)
+    lch[..., 0] = lab[..., 0]
+    np.hypot(lab[..., 1], lab[..., 2], out=lch[..., 1])
+    lch[..., 2] = np.degrees(np.arctan2(lab[..., 2], lab[..., 1])) % 360
+    return lch
+
+
+def lch_to_lab(lch):
+    lch = _channels(lch, 3, "LCh")
+    hue = np.radians(lch[..., 2])
+    lab = np.empty_like(lch)
+    lab[..., 0] = lch[..., 0]
+    lab[..., 1] = lch[..., 1] * np.cos(hue)
+    lab[..., 2] = lch[..., 1] * np.sin(hue)
+    return lab
+
+
+def _hue(rgb, brightest, delta):
+    r, g, b = rgb[..., 0], rgb[..., 1], rgb[..., 2]
+    safe = np.where(delta > 0, delta, 1)
+    hue = np.where(brightest == r, (g - b) / safe % 6,
+                   np.where(brightest == g, (b - r) / safe + 2, (r - g) / safe + 4))
+    return np.where(delta > 0, hue * 60, 0)
+
+
+def _extremes(rgb):
+    brightest = np.maximum(np.maximum(rgb[..., 0], rgb[..., 1]), rgb[..., 2])
+    darkest = np.minimum(np.minimum(rgb[..., 0], rgb[..., 1]), rgb[..., 2])
+    return brightest, darkest
+
+
+def rgb_to_hsv(rgb):
+    rgb = _channels(rgb, 3, "RGB") / 255
+    brightest, darkest = _extremes(rgb)
+    delta = brightest - darkest
+    hsv = np.empty_like(rgb)
+    hsv[..., 0] = _hue(rgb, brightest, delta)
+    hsv[..., 1] = np.where(brightest > 0, delta / np.where(brightest > 0, brightest, 1), 0) * 100
+    hsv[..., 2] = brightest * 100
+    return hsv
+
+
+def hsv_to_rgb(hsv):
+    hsv = _channels(hsv, 3, "HSV")
+    h = hsv[..., 0:1] / 60
+    s, v = hsv[..., 1:2] / 100, hsv[..., 2:3] / 100
+    k = (np.array([5, 3, 1]) + h) % 6
+    return (v - v * s * np.clip(np.minimum(k, 4 - k), 0, 1)) * 255
+
+
+def rgb_to_hsl(rgb):
+    rgb = _channels(rgb, 3, "RGB") / 255
+    brightest, darkest = _extremes(rgb)
+    delta = brightest - darkest
+    lightness = (brightest + darkest) / 2
+    spread = 1 - np.abs(2 * lightness - 1)
+    hsl = np.empty_like(rgb)
+    hsl[..., 0] = _hue(rgb, brightest, delta)
+    hsl[..., 1] = np.where(delta > 0, delta / np.where(spread > 0, spread, 1), 0) * 100
+    hsl[..., 2] = lightness * 100
+    return hsl
+
+
+def hsl_to_rgb(hsl):
+    hsl = _channels(hsl, 3, "HSL")
+    h = hsl[..., 0:1] / 30
+    s, l = hsl[..., 1:2] / 100, hsl[..., 2:3] / 100
+    a = s * np.minimum(l, 1 - l)
+    k = (np.array([0, 8, 4]) + h) % 12
+    return (l - a * np.clip(np.minimum(k - 3, 9 - k), -1, 1)) * 255
+
+
+def delta_e_76(lab1, lab2):
+    diff = _channels(lab1, 3, "Lab") - _channels(lab2, 3, "Lab")
+    return np.sqrt((diff * diff).sum(axis=-1))
+
+
+def delta_e_2000(lab1, lab2):
+    lab1, lab2 = np.broadcast_arrays(_channels(lab1, 3, "Lab"), _channels(lab2, 3, "Lab"))
+    l1, a1, b1 = lab1[..., 0], lab1[..., 1], lab1[..., 2]
+    l2, a2, b2 = lab2[..., 0], lab2[..., 1], lab2[..., 2]
+
+    c7 = ((np.hypot(a1, b1) + np.hypot(a2, b2)) / 2) ** 7
+    g = 1.5 - 0.5 * np.sqrt(c7 / (c7 + 25.0 ** 7))
+    a1, a2 = a1 * g, a2 * g
+    c1, c2 = np.hypot(a1, b1), np.hypot(a2, b2)
+    h1 = np.degrees(np.arctan2(b1, a1)) % 360
+    h2 = np.degrees(np.arctan2(b2, a2)) % 360
+    chroma = c1 * c2
+    colored = chroma != 0
+
+    dh = h2 - h1
+    dh = np.where(dh > 180, dh - 360, np.where(dh < -180, dh + 360, dh))
+    dh = np.where(colored, 2 * np.sqrt(chroma) * np.sin(np.radians(dh) / 2), 0)
+
+    h_mean = h1 + h2
+    h_mean = np.where(~colored, h_mean, np.where(
+        np.abs(h1 - h2) <= 180, h_mean / 2, np.where(h_mean < 360, h_mean + 360, h_mean - 360) / 2))
+    l_mean, c_mean = (l1 + l2) / 2, (c1 + c2) / 2
+
+    t = (1 - 0.17 * np.cos(np.radians(h_mean - 30)) + 0.24 * np.cos(np.radians(2 * h_mean))
+         + 0.32 * np.cos(np.radians(3 * h_mean + 6)) - 0.20 * np.cos(np.radians(4 * h_mean - 63)))
+    l50 = (l_mean - 50) ** 2
+    dl = (l2 - l1) / (1 + 0.015 * l50 / np.sqrt(20 + l50))
+    dc = (c2 - c1) / (1 + 0.045 * c_mean)
+    dh = dh / (1 + 0.015 * c_mean * t)
+    c7 = c_mean ** 7
+    rt = -2 * np.sqrt(c7 / (c7 + 25.0 ** 7)) * np.sin(np.radians(60 * np.exp(-((h_mean - 275) / 25) ** 2)))
+    return np.sqrt(dl * dl + dc * dc + dh * dh + rt * dc * dh)
+
+
+DELTA_E = {"cie76": delta_e_76, "ciede2000": delta_e_2000}
+
+
+def nearest_colors(lab, palette, metric="cie76", budget=NEAREST_BUDGET):
+    lab = _channels(lab, 3, "Lab")
+    palette = _channels(palette, 3, "Lab")
+    if metric not in DELTA_E:
+        raise ValueError(f"Неизвестная метрика: {metric}")
+    if not len(palette):
+        raise ValueError("Палитра пуста")
+    flat = lab.reshape(-1, 3)
+    indices = np.empty(len(flat), dtype=np.intp)
+    distances = np.empty(len(flat))
+    palette_norms = (palette * palette).sum(axis=1)
+
+    # the block of pixels is sized from the palette, and a palette too large for even one
+    # row is searched tile by tile with a running minimum, so memory stays within budget
+    cells = max(1, budget // (8 * NEAREST_TEMPORARIES[metric]))
+    columns = min(len(palette), cells)
+    rows = max(1, cells // columns)
+
+    for start in range(0, len(flat), rows):
+        block = flat[start:start + rows]
+        block_norms = (block * block).sum(axis=1)[:, None]
+        best = np.zeros(len(block), dtype=np.intp)
+        found = np.full(len(block), np.inf)
+        for first in range(0, len(palette), columns):
+            tile = palette[first:first + columns]
+            if metric == "cie76":
+                # |a - b|^2 = |a|^2 - 2ab + |b|^2 turns the search into one matrix product
+                scores = palette_norms[first:first + columns] - 2 * (block @ tile.T)
+                scores += block_norms
+            else:
+                scores = delta_e_2000(block[:, None, :], tile[None, :, :])
+            tile_best = scores.argmin(axis=1)
+            tile_found = scores[np.arange(len(block)), tile_best]
+            # strictly smaller, so ties keep the earliest palette entry as argmin does
+            better = tile_found < found
+            best[better] = tile_best[better] + first
+            found[better] = tile_found[better]
+        if metric == "cie76":
+            # the expanded form loses precision near zero, so measure the winner directly
+            diff = block - palette[best]
+            found = np.sqrt((diff * diff).sum(axis=1))
+        indices[start:start + len(block)] = best
+        distances[start:start + len(block)] = found
+
+    return indices.reshape(lab.shape[:-1]), distances.reshape(lab.shape[:-1])
+
+
+CONVERSIONS = {
+    ("rgb", "cmyk"): rgb_to_cmyk,
+    ("cmyk", "rgb"): cmyk_to_rgb,
+    ("rgb", "xyz"): rgb_to_xyz,
+    ("xyz", "rgb"): xyz_to_rgb,
+    ("cmyk", "xyz"): cmyk_to_xyz,
+    ("xyz", "cmyk"): xyz_to_cmyk,
+    ("xyz", "lab"): xyz_to_lab,
+    ("lab", "xyz"): lab_to_xyz,
+    ("rgb", "lab"): rgb_to_lab,
+    ("lab", "rgb"): lab_to_rgb,
+    ("cmyk", "lab"): cmyk_to_lab,
+    ("lab", "cmyk"): lab_to_cmyk,
+    ("lab", "lch"): lab_to_lch,
+    ("lch", "lab"): lch_to_lab,
+    ("rgb", "hsv"): rgb_to_hsv,
+    ("hsv", "rgb"): hsv_to_rgb,
+    ("rgb", "hsl"): rgb_to_hsl,
+    ("hsl", "rgb"): hsl_to_rgb,
+}
+
+
+def _chain(path):
+    steps = [CONVERSIONS[edge] for edge in path]
+
+    def convert(values):
+        out_of_gamut = None
+        for step in steps:
+            values = step(values)
+            if isinstance(values, tuple):
+                values, mask = values
+                out_of_gamut = mask if out_of_gamut is None else out_of_gamut | mask
+        return values, out_of_gamut
+
+    return convert
+
+
+def get_converter(source, target):
+    source, target = source.lower(), target.lower()
+    if (source, target) in CONVERSIONS:
+        return CONVERSIONS[(source, target)]
+    return _chain(colorconv.conversion_path(CONVERSIONS, source, target))
+
+
+def convert(values, source, target):
+    source, target = source.lower(), target.lower()
+    if source == target:
+        return np.asarray(values, dtype=np.float64), None
+    result = get_converter(source, target)(values)
+    if isinstance(result, tuple):
+        return result
+    return result, None
@@ -0,0 +1,110 @@
+from functools import lru_cache
+
+import colorconv
+
+DEFAULT_MAXSIZE = 65536
+DENSE_SIZE = 1 << 24
+CACHED_CONVERSIONS = ("rgb_to_cmyk", "cmyk_to_rgb", "rgb_to_xyz", "xyz_to_rgb", "cmyk_to_xyz", "xyz_to_cmyk",
+                      "convert")
+
+
+class DenseRGBTable:
+    def __init__(self):
+        import numpy as np
+
+        import color_batch
+
+        # 16M entries of float32: about 256 MB for CMYK and 192 MB for XYZ, built one red plane at a time
+        self.cmyk = np.empty((DENSE_SIZE, 4), dtype=np.float32)
+        self.xyz = np.empty((DENSE_SIZE, 3), dtype=np.float32)
+        levels = np.arange(256, dtype=np.uint8)
+        plane = np.empty((65536, 3), dtype=np.uint8)
+        plane[:, 1] = np.repeat(levels, 256)
+        plane[:, 2] = np.tile(levels, 256)
+        for r in range(256):
+            plane[:, 0] = r
+            self.cmyk[r << 16:(r + 1) << 16] = color_batch.rgb_to_cmyk(plane)
+            self.xyz[r << 16:(r + 1) << 16] = color_batch.rgb_to_xyz(plane)
+        self.hits = 0
+
+    @staticmethod
+    def index(r, g, b):
+        ri, gi, bi = int(r), int(g), int(b)
+        if ri != r or gi != g or bi != b or not (0 <= ri <= 255 and 0 <= gi <= 255 and 0 <= bi <= 255):
+            return None
+        return (ri << 16) | (gi << 8) | bi
+
+
+class ConversionCache:
+    def __init__(self, maxsize=DEFAULT_MAXSIZE, dense=False):
+        self.maxsize = maxsize
+        for name in CACHED_CONVERSIONS:
+            setattr(self, "_" + name, lru_cache(maxsize=maxsize)(getattr(colorconv, name)))
+        self.dense = DenseRGBTable() if dense else None
+
+    def rgb_to_cmyk(self, r, g, b):
+        if self.dense is not None:
+            index = self.dense.index(r, g, b)
+            if index is not None:
+                self.dense.hits += 1
+                return tuple(self.dense.cmyk[index].tolist())
+        return self._rgb_to_cmyk(r, g, b)
+
+    def rgb_to_xyz(self, r, g, b):
+        if self.dense is not None:
+            index = self.dense.index(r, g, b)
+            if index is not None:
+                self.dense.hits += 1
+                return tuple(self.dense.xyz[index].tolist())
+        return self._rgb_to_xyz(r, g, b)
+
+    def cmyk_to_rgb(self, c, m, y, k):
+        return self._cmyk_to_rgb(c, m, y, k)
+
+    def xyz_to_rgb(self, x, y, z):
+        return self._xyz_to_rgb(x, y, z)
+
+    def cmyk_to_xyz(self, c, m, y, k):
+        return self._cmyk_to_xyz(c, m, y, k)
+
+    def xyz_to_cmyk(self, x, y, z):
+        return self._xyz_to_cmyk(x, y, z)
+
+    def convert(self, source, target, *values):
+        if self.dense is not None and source == "rgb" and target in ("cmyk", "xyz"):
+            return colorconv.GamutResult(getattr(self, "rgb_to_" + target)(*values), False)
+        return self._convert(source, target, *values)
+
+    def stats(self):
+        result = {}
+        for name in CACHED_CONVERSIONS:
+            info = getattr(self, "_" + name).cache_info()
+            result[name] = {"hits": info.hits, "misses": info.misses, "size": info.currsize}
+        hits = sum(s["hits"] for s in result.values())
+        misses = sum(s["misses"] for s in result.values())
+        if self.dense is not None:
+            hits += self.dense.hits
+            result["dense"] = {"hits": self.dense.hits, "misses": 0, "size": len(self.dense.cmyk)}
+        total = hits + misses
+        result["total"] = {"hits": hits, "misses": misses, "hit_rate": hits / total if total else 0.0}
+        return result
+
+    def clear(self):
+        for name in CACHED_CONVERSIONS:
+            getattr(self, "_" + name).cache_clear()
+        if self.dense is not None:
+            self.dense.hits = 0
+
+
+_shared_cache = None
+
+
+def get_shared_cache(maxsize=DEFAULT_MAXSIZE, dense=False):
+    global _shared_cache
+    if _shared_cache is None:
+        _shared_cache = ConversionCache(maxsize, dense)
+    elif _shared_cache.maxsize != maxsize or (_shared_cache.dense is not None) != dense:
+        # one cache is shared by the whole process, so a second configuration cannot be honoured
+        raise ValueError(f"Общий кэш уже создан с maxsize={_shared_cache.maxsize}, "
+                         f"dense={_shared_cache.dense is not None}; запрошено maxsize={maxsize}, dense={dense}")
+    return _shared_cache
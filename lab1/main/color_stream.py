@@ -0,0 +1,239 @@
+import argparse
+import os
+import signal
+import socket
+import socketserver
+import stat
+import sys
+import threading
+
+import numpy as np
+
+import color_batch
+from colorconv import GAMUT_MARK, MODELS, parse_command
+
+READ_SIZE = 1 << 16
+CHANNELS = {model: 4 if model == "cmyk" else 3 for model in MODELS}
+INPUT_RECORD = "<f4"
+
+
+def output_record(target):
+    return np.dtype([("values", "<f4", (CHANNELS[target],)), ("out_of_gamut", "u1")])
+
+
+def _line_format(count):
+    line = " ".join(["%.6g"] * count)
+    return line + "\n", f"{line} {GAMUT_MARK}\n"
+
+
+class TextConverter:
+    # Lines are parsed and converted a whole read at a time. Bad lines are answered with
+    # a "#" comment, so the output stays aligned with the input and np.loadtxt skips them.
+    def __init__(self, source, target):
+        self.source, self.target = source, target
+        self.channels = CHANNELS[source]
+        self.plain, self.marked = _line_format(CHANNELS[target])
+        self.line_number = 0
+
+    def convert(self, lines):
+        rows = [line.replace(b",", b" ").split() for line in lines]
+        parsed, errors = [], {}
+        for index, row in enumerate(rows):
+            self.line_number += 1
+            if not row:
+                errors[index] = None
+            elif len(row) != self.channels:
+                errors[index] = f"# Строка {self.line_number}: ожидается {self.channels} числа, получено {len(row)}\n"
+            else:
+                parsed.append(row)
+
+        try:
+            values = np.array(parsed, dtype=np.float64).reshape(-1, self.channels)
+        except ValueError:
+            return self._convert_each(lines)
+        result, out_of_gamut = color_batch.convert(values, self.source, self.target)
+        if out_of_gamut is None:
+            out_of_gamut = np.zeros(len(result), dtype=bool)
+
+        formats = [self.marked if mark else self.plain for mark in out_of_gamut.tolist()]
+        if not errors:
+            return ("".join(formats) % tuple(result.ravel().tolist())).encode()
+
+        converted = iter(format_ % tuple(row) for format_, row in zip(formats, result.tolist()))
+        return "".join(
+            (errors[index] or "") if index in errors else next(converted) for index in range(len(rows))).encode()
+
+    def _convert_each(self, lines):
+        # a number failed to parse somewhere in the chunk, so find it line by line
+        self.line_number -= len(lines)
+        return b"".join(self.convert([line]) if self._parses(line) else self._error(line) for line in lines)
+
+    @staticmethod
+    def _parses(line):
+        try:
+            [float(part) for part in line.replace(b",", b" ").split()]
+            return True
+        except ValueError:
+            return False
+
+    def _error(self, line):
+        self.line_number += 1
+        return f"# Строка {self.line_number}: не удалось разобрать число\n".encode()
+
+
+def stream_text(reader, writer, source, target, read_size=READ_SIZE):
+    converter = TextConverter(source, target)
+    tail = b""
+    while True:
+        # read1 returns whatever is available, so an interactive client gets its answer
+        # right away and a fast pipe is processed in read_size chunks
+        data = reader.read1(read_size)
+        if not data:
+            break
+        lines = (tail + data).split(b"\n")
+        tail = lines.pop()
+        if lines:
+            writer.write(converter.convert(lines))
+            writer.flush()
+    if tail.strip():
+        writer.write(converter.convert([tail]))
+        writer.flush()
+
+
+def stream_binary(reader, writer, source, target, read_size=READ_SIZE):
+    record_size = CHANNELS[source] * np.dtype(INPUT_RECORD).itemsize
+    records = np.empty(0, dtype=output_record(target))
+    tail = b""
+    while True:
+        data = reader.read1(read_size)
+        if not data:
+            break
+        data = tail + data
+        usable = len(data) - len(data) % record_size
+        tail = data[usable:]
+        if not usable:
+            continue
+        values = np.frombuffer(data, dtype=INPUT_RECORD, count=usable // 4).reshape(-1, CHANNELS[source])
+        result, out_of_gamut = color_batch.convert(values, source, target)
+        if len(records) != len(result):
+            records = np.empty(len(result), dtype=output_record(target))
+        records["values"] = result
+        records["out_of_gamut"] = out_of_gamut if out_of_gamut is not None else 0
+        writer.write(records.tobytes())
+        writer.flush()
+    if tail:
+        print(f"Неполная запись в конце потока: {len(tail)} байт пропущено", file=sys.stderr)
+
+
+def stream(reader, writer, command, binary=False, read_size=READ_SIZE):
+    source, target = parse_command(command)
+    handler = stream_binary if binary else stream_text
+    handler(reader, writer, source, target, read_size)
+
+
+class ConversionHandler(socketserver.StreamRequestHandler):
+    # The first line names the conversion, optionally followed by "binary",
+    # e.g. "rgb2lab" or "rgb2lab binary"; the rest of the connection is the data.
+    def handle(self):
+        header = self.rfile.readline().decode(errors="replace").split()
+        try:
+            if not header or header[1:] not in ([], ["binary"]):
+                raise ValueError("ожидается заголовок вида 'rgb2lab' или 'rgb2lab binary'")
+            stream(self.rfile, self.wfile, header[0], binary=bool(header[1:]), read_size=self.server.read_size)
+        except ValueError as e:
+            self.wfile.write(f"# Ошибка: {e}\n".encode())
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+
+def _remove_stale_socket(path):
+    try:
+        mode = os.stat(path).st_mode
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(mode):
+        raise ValueError(f"{path} существует и не является сокетом")
+    os.unlink(path)
+
+
+def serve(path, read_size=READ_SIZE):
+    if not hasattr(socketserver, "ThreadingUnixStreamServer"):
+        raise ValueError("Unix-сокеты не поддерживаются в этой системе")
+    _remove_stale_socket(path)
+    with socketserver.ThreadingUnixStreamServer(path, ConversionHandler) as server:
+        server.daemon_threads = True
+        server.read_size = read_size
+        print(f"Сервер преобразований слушает {path}", file=sys.stderr)
+        signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            os.unlink(path)
+
+
+def connect(path, command, reader, writer, binary=False, read_size=READ_SIZE):
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(path)
+        sock.sendall(f"{command}{' binary' if binary else ''}\n".encode())
+
+        # send from a separate thread, otherwise a large input and output both fill
+        # their socket buffers and the two sides wait on each other
+        def send():
+            while True:
+                data = reader.read1(read_size)
+                if not data:
+                    break
+                sock.sendall(data)
+            sock.shutdown(socket.SHUT_WR)
+
+        sender = threading.Thread(target=send, daemon=True)
+        sender.start()
+        while True:
+            data = sock.recv(read_size)
+            if not data:
+                break
+            writer.write(data)
+            writer.flush()
+        sender.join()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Потоковое преобразование цветов из stdin в stdout через векторный путь",
+        epilog=f"Текст: по цвету в строке, числа через пробел или запятую; {GAMUT_MARK} — цвет вне охвата RGB, "
+               "строки с ошибками заменяются комментарием '#'. Двоичный режим: записи из float32 на входе, "
+               "на выходе float32 значения и байт признака выхода за охват.")
+    parser.add_argument("command", nargs="?", help="преобразование вида rgb2cmyk (не нужно для --serve)")
+    parser.add_argument("--binary", action="store_true", help="упакованные двоичные записи вместо текста")
+    parser.add_argument("--read-size", type=int, default=READ_SIZE, help="размер порции чтения в байтах")
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--serve", metavar="SOCKET", help="запустить сервер на Unix-сокете")
+    group.add_argument("--connect", metavar="SOCKET", help="отправить stdin на сервер и вывести ответ")
+    args = parser.parse_args(argv)
+
+    if args.serve:
+        try:
+            serve(args.serve, args.read_size)
+        except (ValueError, OSError) as e:
+            parser.error(str(e))
+        return 0
+
+    if not args.command:
+        parser.error("укажите преобразование, например rgb2cmyk")
+    try:
+        parse_command(args.command)
+        if args.connect:
+            connect(args.connect, args.command, sys.stdin.buffer, sys.stdout.buffer, args.binary, args.read_size)
+        else:
+            stream(sys.stdin.buffer, sys.stdout.buffer, args.command, args.binary, args.read_size)
+    except BrokenPipeError:
+        pass
+    except (ValueError, OSError) as e:
+        parser.error(str(e))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,393 @@
+import colorsys
+import math
+import sys
+
+from srgb_lut import linearize_8bit, correct_gamma
+
+MODELS = ("rgb", "cmyk", "xyz", "lab", "lch", "hsv", "hsl")
+
+RGB_TO_XYZ = (
+    (0.4124564, 0.3575761, 0.1804375),
+    (0.2126729, 0.7151522, 0.0721750),
+    (0.0193339, 0.1191920, 0.9503041),
+)
+XYZ_TO_RGB = (
+    (3.2404542, -1.5371385, -0.4985314),
+    (-0.9692660, 1.8760108, 0.0415560),
+    (0.0556434, -0.2040259, 1.0572252),
+)
+WHITE_D65 = (95.047, 100.0, 108.883)
+GAMUT_MARK = "!"
+
+LAB_EPSILON = 216 / 24389
+LAB_KAPPA = 24389 / 27
+
+# linear RGB straight to XYZ relative to the white point and back, so Lab skips the XYZ step
+(_XR, _XG, _XB), (_YR, _YG, _YB), (_ZR, _ZG, _ZB) = (
+    tuple(c * 100 / w for c in row) for row, w in zip(RGB_TO_XYZ, WHITE_D65))
+(_RX, _RY, _RZ), (_GX, _GY, _GZ), (_BX, _BY, _BZ) = (
+    tuple(c * w / 100 for c, w in zip(row, WHITE_D65)) for row in XYZ_TO_RGB)
+
+
+# Scripts import this module thousands of times, so it avoids collections/functools:
+# GamutResult is a hand-written named pair instead of a namedtuple.
+class GamutResult(tuple):
+    __slots__ = ()
+
+    def __new__(cls, values, out_of_gamut):
+        return tuple.__new__(cls, (values, out_of_gamut))
+
+    @property
+    def values(self):
+        return self[0]
+
+    @property
+    def out_of_gamut(self):
+        return self[1]
+
+    def __repr__(self):
+        return f"GamutResult(values={self[0]!r}, out_of_gamut={self[1]!r})"
+
+
+def rgb_to_cmyk(r, g, b):
+    if r == 0 and g == 0 and b == 0:
+        return 0, 0, 0, 100
+    r_, g_, b_ = r / 255, g / 255, b / 255
+    k = 1 - max(r_, g_, b_)
+    if k == 1:
+        return 0, 0, 0, 100
+    c = (1 - r_ - k) / (1 - k)
+    m = (1 - g_ - k) / (1 - k)
+    y = (1 - b_ - k) / (1 - k)
+    return c * 100, m * 100, y * 100, k * 100
+
+
+def cmyk_to_rgb(c, m, y, k):
+    c, m, y, k = c / 100, m / 100, y / 100, k / 100
+    r = 255 * (1 - c) * (1 - k)
+    g = 255 * (1 - m) * (1 - k)
+    b = 255 * (1 - y) * (1 - k)
+    return r, g, b
+
+
+def rgb_to_xyz(r, g, b):
+    r_lin, g_lin, b_lin = linearize_8bit(r), linearize_8bit(g), linearize_8bit(b)
+    x = r_lin * 0.4124564 + g_lin * 0.3575761 + b_lin * 0.1804375
+    y = r_lin * 0.2126729 + g_lin * 0.7151522 + b_lin * 0.0721750
+    z = r_lin * 0.0193339 + g_lin * 0.1191920 + b_lin * 0.9503041
+    return x * 100, y * 100, z * 100
+
+
+def _encode_rgb(r_lin, g_lin, b_lin):
+    r, g, b = correct_gamma(r_lin), correct_gamma(g_lin), correct_gamma(b_lin)
+    is_out_of_gamut = not (0 <= r <= 1 and 0 <= g <= 1 and 0 <= b <= 1)
+
+    r, g, b = min(max(r, 0), 1), min(max(g, 0), 1), min(max(b, 0), 1)
+    return GamutResult((r * 255, g * 255, b * 255), is_out_of_gamut)
+
+
+def xyz_to_rgb(x, y, z):
+    x, y, z = x / 100, y / 100, z / 100
+    r_lin = x * 3.2404542 - y * 1.5371385 - z * 0.4985314
+    g_lin = x * -0.9692660 + y * 1.8760108 + z * 0.0415560
+    b_lin = x * 0.0556434 - y * 0.2040259 + z * 1.0572252
+    return _encode_rgb(r_lin, g_lin, b_lin)
+
+
+def cmyk_to_xyz(c, m, y, k):
+    return rgb_to_xyz(*cmyk_to_rgb(c, m, y, k))
+
+
+def xyz_to_cmyk(x, y, z):
+    rgb, is_out_of_gamut = xyz_to_rgb(x, y, z)
+    return GamutResult(rgb_to_cmyk(*rgb), is_out_of_gamut)
+
+
+def _lab_f(t):
+    return t ** (1 / 3) if t > LAB_EPSILON else (LAB_KAPPA * t + 16) / 116
+
+
+def _lab_f_inv(t):
+    cube = t * t * t
+    return cube if cube > LAB_EPSILON else (116 * t - 16) / LAB_KAPPA
+
+
+def _lab(x, y, z):
+    fx, fy, fz = _lab_f(x), _lab_f(y), _lab_f(z)
+    return 116 * fy - 16, 500 * (fx - fy), 200 * (fy - fz)
+
+
+def _lab_to_relative_xyz(l, a, b):
+    fy = (l + 16) / 116
+    y = fy * fy * fy if l > LAB_KAPPA * LAB_EPSILON else l / LAB_KAPPA
+    return _lab_f_inv(fy + a / 500), y, _lab_f_inv(fy - b / 200)
+
+
+def xyz_to_lab(x, y, z):
+    return _lab(x / WHITE_D65[0], y / WHITE_D65[1], z / WHITE_D65[2])
+
+
+def lab_to_xyz(l, a, b):
+    x, y, z = _lab_to_relative_xyz(l, a, b)
+    return x * WHITE_D65[0], y * WHITE_D65[1], z * WHITE_D65[2]
+
+
+def rgb_to_lab(r, g, b):
+    r, g, b = linearize_8bit(r), linearize_8bit(g), linearize_8bit(b)
+    return _lab(r * _XR + g * _XG + b * _XB,
+                r * _YR + g * _YG + b * _YB,
+                r * _ZR + g * _ZG + b * _ZB)
+
+
+def lab_to_rgb(l, a, b):
+    x, y, z = _lab_to_relative_xyz(l, a, b)
+    return _encode_rgb(x * _RX + y * _RY + z * _RZ,
+                       x * _GX + y * _GY + z * _GZ,
+                       x * _BX + y * _BY + z * _BZ)
+
+
+def cmyk_to_lab(c, m, y, k):
+    scale = 255 * (100 - k) / 10000
+    return rgb_to_lab((100 - c) * scale, (100 - m) * scale, (100 - y) * scale)
+
+
+def lab_to_cmyk(l, a, b):
+    rgb, is_out_of_gamut = lab_to_rgb(l, a, b)
+    return GamutResult(rgb_to_cmyk(*rgb), is_out_of_gamut)
+
+
+def lab_to_lch(l, a, b):
+    return l, math.hypot(a, b), math.degrees(math.atan2(b, a)) % 360
+
+
+def lch_to_lab(l, c, h):
+    h = math.radians(h)
+    return l, c * math.cos(h), c * math.sin(h)
+
+
+def rgb_to_hsv(r, g, b):
+    h, s, v = colorsys.rgb_to_hsv(r / 255, g / 255, b / 255)
+    return h * 360, s * 100, v * 100
+
+
+def hsv_to_rgb(h, s, v):
+    r, g, b = colorsys.hsv_to_rgb(h / 360 % 1, s / 100, v / 100)
+    return r * 255, g * 255, b * 255
+
+
+def rgb_to_hsl(r, g, b):
+    h, l, s = colorsys.rgb_to_hls(r / 255, g / 255, b / 255)
+    return h * 360, s * 100, l * 100
+
+
+def hsl_to_rgb(h, s, l):
+    r, g, b = colorsys.hls_to_rgb(h / 360 % 1, l / 100, s / 100)
+    return r * 255, g * 255, b * 255
+
+
+def hex_to_rgb(hex_color):
+    hex_color = hex_color.lstrip('#')
+    return tuple(int(hex_color[i:i + 2], 16) for i in (0, 2, 4))
+
+
+# Direct (fused) conversions; anything else is chained through the shortest path in this graph.
+# The functions from GAMUT_CONVERSIONS return GamutResult.
+CONVERSIONS = {
+    ("rgb", "cmyk"): rgb_to_cmyk,
+    ("cmyk", "rgb"): cmyk_to_rgb,
+    ("rgb", "xyz"): rgb_to_xyz,
+    ("xyz", "rgb"): xyz_to_rgb,
+    ("cmyk", "xyz"): cmyk_to_xyz,
+    ("xyz", "cmyk"): xyz_to_cmyk,
+    ("xyz", "lab"): xyz_to_lab,
+    ("lab", "xyz"): lab_to_xyz,
+    ("rgb", "lab"): rgb_to_lab,
+    ("lab", "rgb"): lab_to_rgb,
+    ("cmyk", "lab"): cmyk_to_lab,
+    ("lab", "cmyk"): lab_to_cmyk,
+    ("lab", "lch"): lab_to_lch,
+    ("lch", "lab"): lch_to_lab,
+    ("rgb", "hsv"): rgb_to_hsv,
+    ("hsv", "rgb"): hsv_to_rgb,
+    ("rgb", "hsl"): rgb_to_hsl,
+    ("hsl", "rgb"): hsl_to_rgb,
+}
+GAMUT_CONVERSIONS = {("xyz", "rgb"), ("xyz", "cmyk"), ("lab", "rgb"), ("lab", "cmyk")}
+
+
+def conversion_path(edges, source, target):
+    previous = {source: None}
+    pending = [source]
+    for model in pending:
+        if model == target:
+            path = []
+            while previous[model] is not None:
+                path.append((previous[model], model))
+                model = previous[model]
+            return path[::-1]
+        for start, end in edges:
+            if start == model and end not in previous:
+                previous[end] = model
+                pending.append(end)
+    raise ValueError(f"Неизвестное преобразование: {source} -> {target}")
+
+
+def _chain(path):
+    steps = [(CONVERSIONS[edge], edge in GAMUT_CONVERSIONS) for edge in path]
+
+    def convert(*values):
+        out_of_gamut = False
+        for step, checks_gamut in steps:
+            values = step(*values)
+            if checks_gamut:
+                values, is_out_of_gamut = values
+                out_of_gamut = out_of_gamut or is_out_of_gamut
+        return GamutResult(values, out_of_gamut)
+
+    return convert
+
+
+_converters = {}
+
+
+def get_converter(source, target):
+    key = source.lower(), target.lower()
+    func = _converters.get(key)
+    if func is None:
+        source, target = key
+        if source == target:
+            func = lambda *values: GamutResult(values, False)
+        elif key in GAMUT_CONVERSIONS:
+            func = CONVERSIONS[key]
+        else:
+            func = _chain(conversion_path(CONVERSIONS, source, target))
+        _converters[key] = func
+    return func
+
+
+def convert(source, target, *values):
+    return get_converter(source, target)(*values)
+
+
+def delta_e_76(lab1, lab2):
+    return math.dist(lab1, lab2)
+
+
+def delta_e_2000(lab1, lab2):
+    l1, a1, b1 = lab1
+    l2, a2, b2 = lab2
+    c_mean = (math.hypot(a1, b1) + math.hypot(a2, b2)) / 2
+    c7 = c_mean ** 7
+    g = 0.5 * (1 - math.sqrt(c7 / (c7 + 25 ** 7)))
+    a1, a2 = a1 * (1 + g), a2 * (1 + g)
+    c1, c2 = math.hypot(a1, b1), math.hypot(a2, b2)
+    h1 = math.degrees(math.atan2(b1, a1)) % 360 if c1 else 0.0
+    h2 = math.degrees(math.atan2(b2, a2)) % 360 if c2 else 0.0
+
+    dl, dc = l2 - l1, c2 - c1
+    dh = h2 - h1
+    if c1 * c2 == 0:
+        dh = 0.0
+    elif dh > 180:
+        dh -= 360
+    elif dh < -180:
+        dh += 360
+    dh = 2 * math.sqrt(c1 * c2) * math.sin(math.radians(dh) / 2)
+
+    l_mean, c_mean = (l1 + l2) / 2, (c1 + c2) / 2
+    h_mean = h1 + h2
+    if c1 * c2 != 0:
+        if abs(h1 - h2) <= 180:
+            h_mean /= 2
+        else:
+            h_mean = (h_mean + 360) / 2 if h_mean < 360 else (h_mean - 360) / 2
+
+    t = (1 - 0.17 * math.cos(math.radians(h_mean - 30)) + 0.24 * math.cos(math.radians(2 * h_mean))
+         + 0.32 * math.cos(math.radians(3 * h_mean + 6)) - 0.20 * math.cos(math.radians(4 * h_mean - 63)))
+    l50 = (l_mean - 50) ** 2
+    sl = 1 + 0.015 * l50 / math.sqrt(20 + l50)
+    sc = 1 + 0.045 * c_mean
+    sh = 1 + 0.015 * c_mean * t
+    c7 = c_mean ** 7
+    rt = (-2 * math.sqrt(c7 / (c7 + 25 ** 7))
+          * math.sin(math.radians(60 * math.exp(-((h_mean - 275) / 25) ** 2))))
+    return math.sqrt((dl / sl) ** 2 + (dc / sc) ** 2 + (dh / sh) ** 2 + rt * (dc / sc) * (dh / sh))
+
+
+def parse_command(command):
+    source, sep, target = command.lower().partition("2")
+    if not sep or source not in MODELS or target not in MODELS:
+        raise ValueError(f"Неизвестная команда: {command} (ожидается, например, rgb2cmyk)")
+    return source, target
+
+
+def parse_values(text, source):
+    values = [float(part) for part in text.replace(",", " ").split()]
+    expected = 4 if source == "cmyk" else 3
+    if len(values) != expected:
+        raise ValueError(f"{source.upper()}: ожидается {expected} числа, получено {len(values)}")
+    return values
+
+
+def format_values(values, out_of_gamut=False):
+    text = " ".join(f"{value:.6g}" for value in values)
+    return f"{text} {GAMUT_MARK}" if out_of_gamut else text
+
+
+def stream(lines, source, target, output):
+    func = get_converter(source, target)
+    errors = 0
+    for number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            values, out_of_gamut = func(*parse_values(line, source))
+        except ValueError as e:
+            errors += 1
+            print(f"Строка {number}: {e}", file=sys.stderr)
+            continue
+        output.write(format_values(values, out_of_gamut) + "\n")
+    return errors
+
+
+def run(command, values, lines=None, output=None):
+    source, target = parse_command(command)
+    output = output or sys.stdout
+    if values:
+        values, out_of_gamut = convert(source, target, *parse_values(" ".join(values), source))
+        output.write(format_values(values, out_of_gamut) + "\n")
+        return 0
+    return 1 if stream(lines or sys.stdin, source, target, output) else 0
+
+
+def _is_option(arg):
+    return arg.startswith("-") and not (arg[1:2].isdigit() or arg[1:2] == ".")
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    # argparse takes longer to import than the conversion itself, so the plain
+    # "rgb2cmyk 255 0 0" form skips it; errors and --help still go through argparse
+    if argv and not any(_is_option(arg) for arg in argv):
+        try:
+            return run(argv[0], argv[1:])
+        except ValueError:
+            pass
+
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Преобразование цвета между моделями: " + ", ".join(MODELS),
+        epilog=f"Без значений читает цвета построчно из stdin. Метка {GAMUT_MARK} — цвет вне охвата RGB.")
+    parser.add_argument("command", help="преобразование вида rgb2cmyk, xyz2lab, lch2hsl")
+    parser.add_argument("values", nargs="*", help="компоненты цвета")
+    args = parser.parse_args(argv)
+
+    try:
+        return run(args.command, args.values)
+    except ValueError as e:
+        parser.error(str(e))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
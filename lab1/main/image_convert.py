@@ -0,0 +1,231 @@
+import argparse
+import os
+import struct
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+import numpy as np
+
+import color_batch
+from colorconv import MODELS
+from tiff_reader import TiffChunks
+
+DEFAULT_TILE = 512
+DEFAULT_WORKERS = os.cpu_count() or 4
+CHANNELS = {model: 4 if model == "cmyk" else 3 for model in MODELS}
+TIFF_LIMIT = 2 ** 32
+MAX_DECODED_PIXELS = 1 << 25
+
+
+class ImageSource:
+    # Every source is read tile by tile with bounded memory: .npy through a memory map,
+    # uncompressed TIFF straight from its strips or tiles. Other formats can only be
+    # decoded whole, so PIL is used for them up to MAX_DECODED_PIXELS.
+    def __init__(self, path, source_model=None):
+        self.path = path
+        self.image = None
+        self.array = None
+        self.chunks = None
+
+        if path.lower().endswith(".npy"):
+            self.array = np.load(path, mmap_mode="r")
+            if self.array.ndim != 3 or self.array.shape[2] not in (3, 4):
+                raise ValueError(f"Ожидается массив (H, W, 3) или (H, W, 4), получено {self.array.shape}")
+            self.height, self.width = self.array.shape[:2]
+            self.model = source_model or ("cmyk" if self.array.shape[2] == 4 else "rgb")
+        else:
+            if path.lower().endswith((".tif", ".tiff")):
+                self.chunks = TiffChunks.open(path)
+            if self.chunks is not None and source_model in (None, self.chunks.model):
+                self.width, self.height = self.chunks.width, self.chunks.height
+                self.model = self.chunks.model
+            else:
+                if self.chunks is not None:
+                    self.chunks.close()
+                    self.chunks = None
+                self._open_decoded(path, source_model)
+
+        if self.model not in MODELS:
+            raise ValueError(f"Неизвестная модель: {self.model}")
+
+    def _open_decoded(self, path, source_model):
+        from PIL import Image
+
+        try:
+            # opening only reads the header; PIL's own decompression bomb limit stays in place
+            self.image = Image.open(path)
+        except Image.DecompressionBombError as e:
+            raise ValueError(f"{e}. Сохраните изображение как несжатый TIFF или .npy") from None
+        self.width, self.height = self.image.size
+        if self.width * self.height > MAX_DECODED_PIXELS:
+            self.image.close()
+            raise ValueError(
+                f"{self.width}x{self.height}: этот формат нельзя читать по частям, а целиком он больше "
+                f"{MAX_DECODED_PIXELS} пикселей. Сохраните изображение как несжатый TIFF или .npy")
+        self.model = source_model or ("cmyk" if self.image.mode == "CMYK" else "rgb")
+        self.image.load()
+
+    def read(self, y, x, h, w):
+        if self.array is not None:
+            return np.array(self.array[y:y + h, x:x + w])
+
+        if self.chunks is not None:
+            values = self.chunks.read(y, x, h, w)
+            return values * (100 / 255) if self.model == "cmyk" else values
+
+        tile = self.image.crop((x, y, x + w, y + h))
+        if self.model == "cmyk":
+            return np.asarray(tile.convert("CMYK"), dtype=np.float64) * (100 / 255)
+        return np.asarray(tile.convert("RGB"))
+
+    def close(self):
+        if self.image is not None:
+            self.image.close()
+        if self.chunks is not None:
+            self.chunks.close()
+
+
+def open_output(path, target, height, width):
+    channels = CHANNELS[target]
+    if path.lower().endswith(".npy"):
+        return np.lib.format.open_memmap(path, mode="w+", dtype=np.float32, shape=(height, width, channels))
+    if path.lower().endswith((".tif", ".tiff")):
+        return open_tiff(path, target, height, width)
+    raise ValueError("Поддерживается вывод только в .tif/.tiff и .npy")
+
+
+def open_tiff(path, target, height, width, rows_per_strip=DEFAULT_TILE):
+    channels = CHANNELS[target]
+    if target in ("rgb", "cmyk"):
+        dtype, bits, sample_format, photometric = np.uint8, 8, 1, 5 if target == "cmyk" else 2
+    else:
+        # XYZ, Lab, LCh, HSV and HSL are stored as raw float32 samples
+        dtype, bits, sample_format, photometric = np.float32, 32, 3, 2
+
+    row_bytes = width * channels * np.dtype(dtype).itemsize
+    total = row_bytes * height
+    strips = (height + rows_per_strip - 1) // rows_per_strip
+
+    entry_count = 11
+    ifd_size = 2 + entry_count * 12 + 4
+    extra_offset = 8 + ifd_size
+    bits_offset = extra_offset
+    format_offset = bits_offset + 2 * channels
+    offsets_offset = format_offset + 2 * channels
+    counts_offset = offsets_offset + 4 * strips
+    data_offset = (counts_offset + 4 * strips + 15) // 16 * 16
+    if data_offset + total >= TIFF_LIMIT:
+        raise ValueError("Результат больше 4 ГБ, используйте вывод в .npy")
+
+    strip_offsets = [data_offset + i * rows_per_strip * row_bytes for i in range(strips)]
+    strip_counts = [min(rows_per_strip, height - i * rows_per_strip) * row_bytes for i in range(strips)]
+
+    def entry(tag, field_type, count, value):
+        if field_type == 3 and count == 1:
+            return struct.pack("<HHIHH", tag, field_type, count, value, 0)
+        return struct.pack("<HHII", tag, field_type, count, value)
+
+    entries = [
+        entry(256, 4, 1, width),
+        entry(257, 4, 1, height),
+        entry(258, 3, channels, bits_offset),
+        entry(259, 3, 1, 1),
+        entry(262, 3, 1, photometric),
+        entry(273, 4, strips, offsets_offset) if strips > 1 else entry(273, 4, 1, strip_offsets[0]),
+        entry(277, 3, 1, channels),
+        entry(278, 4, 1, rows_per_strip),
+        entry(279, 4, strips, counts_offset) if strips > 1 else entry(279, 4, 1, strip_counts[0]),
+        entry(284, 3, 1, 1),
+        entry(339, 3, channels, format_offset),
+    ]
+
+    with open(path, "wb") as f:
+        f.write(b"II*\0" + struct.pack("<I", 8))
+        f.write(struct.pack("<H", entry_count) + b"".join(entries) + struct.pack("<I", 0))
+        f.write(struct.pack(f"<{channels}H", *([bits] * channels)))
+        f.write(struct.pack(f"<{channels}H", *([sample_format] * channels)))
+        f.write(struct.pack(f"<{strips}I", *strip_offsets))
+        f.write(struct.pack(f"<{strips}I", *strip_counts))
+        f.truncate(data_offset + total)
+
+    return np.memmap(path, dtype=dtype, mode="r+", offset=data_offset, shape=(height, width, channels))
+
+
+def encode_tile(values, target, dtype):
+    if dtype == np.uint8:
+        scale = 255 / 100 if target == "cmyk" else 1
+        return np.clip(np.rint(values * scale), 0, 255).astype(np.uint8)
+    return values.astype(dtype)
+
+
+def convert_tile(source_values, source, target, output, y, x):
+    values, out_of_gamut = color_batch.convert(source_values, source, target)
+    output[y:y + values.shape[0], x:x + values.shape[1]] = encode_tile(values, target, output.dtype)
+    return int(out_of_gamut.sum()) if out_of_gamut is not None else 0
+
+
+def convert_image(input_path, output_path, target, source=None, tile=DEFAULT_TILE,
+                  workers=DEFAULT_WORKERS, on_progress=None):
+    if target not in MODELS:
+        raise ValueError(f"Неизвестная модель: {target}")
+
+    image = ImageSource(input_path, source)
+    output = None
+    clipped = 0
+    try:
+        output = open_output(output_path, target, image.height, image.width)
+        tiles = [(y, x) for y in range(0, image.height, tile) for x in range(0, image.width, tile)]
+        done_count = 0
+        in_flight = set()
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for y, x in tiles:
+                values = image.read(y, x, min(tile, image.height - y), min(tile, image.width - x))
+                in_flight.add(executor.submit(convert_tile, values, image.model, target, output, y, x))
+
+                while len(in_flight) >= 2 * workers:
+                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        clipped += future.result()
+                        done_count += 1
+                    if on_progress:
+                        on_progress(done_count, len(tiles))
+
+            for future in in_flight:
+                clipped += future.result()
+                done_count += 1
+            if on_progress:
+                on_progress(done_count, len(tiles))
+
+        output.flush()
+    finally:
+        image.close()
+        del output
+
+    return image.width, image.height, clipped
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Преобразование изображения в другую цветовую модель по тайлам")
+    parser.add_argument("input", help="исходное изображение или .npy массив (H, W, 3/4)")
+    parser.add_argument("output", help="результат: .tif/.tiff или .npy")
+    parser.add_argument("--to", dest="target", choices=MODELS, required=True, help="целевая модель")
+    parser.add_argument("--from", dest="source", choices=MODELS, default=None,
+                        help="модель исходных данных (по умолчанию по числу каналов/режиму изображения)")
+    parser.add_argument("--tile", type=int, default=DEFAULT_TILE, help="размер тайла в пикселях")
+    parser.add_argument("-w", "--workers", type=int, default=DEFAULT_WORKERS, help="число потоков")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    width, height, clipped = convert_image(args.input, args.output, args.target, args.source,
+                                           args.tile, args.workers)
+    elapsed = time.perf_counter() - start
+    print(f"{width}x{height} -> {args.output} за {elapsed:.2f} сек", file=sys.stderr)
+    if clipped:
+        print(f"Внимание: {clipped} пикселей вне охвата RGB были скорректированы", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
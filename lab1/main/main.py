@@ -1,17 +1,43 @@
+import threading
+import time
 import tkinter as tk
-from tkinter import ttk, colorchooser
+from collections import deque
+from tkinter import ttk, colorchooser, filedialog
+import colorconv
+from color_cache import get_shared_cache
+
+FRAME_INTERVAL_MS = 16
+RATE_WINDOW = 1.0
+
+MODEL_PANELS = (
+    ("rgb", "RGB", [("R", 0, 255), ("G", 0, 255), ("B", 0, 255)]),
+    ("cmyk", "CMYK", [("C", 0, 100), ("M", 0, 100), ("Y", 0, 100), ("K", 0, 100)]),
+    ("xyz", "XYZ", [("X", 0, 95), ("Y", 0, 100), ("Z", 0, 110)]),
+    ("lab", "Lab", [("L", 0, 100), ("A", -128, 127), ("B", -128, 127)]),
+    ("lch", "LCh", [("L", 0, 100), ("C", 0, 150), ("H", 0, 360)]),
+    ("hsv", "HSV", [("H", 0, 360), ("S", 0, 100), ("V", 0, 100)]),
+    ("hsl", "HSL", [("H", 0, 360), ("S", 0, 100), ("L", 0, 100)]),
+)
+PRECISION = {"rgb": None, "cmyk": 1, "xyz": 2, "lab": 2, "lch": 2, "hsv": 1, "hsl": 1}
 
 class ColorConverterApp(tk.Tk):
 
     def __init__(self):
         super().__init__()
         self.title("Конвертер цветовых моделей")
-        self.geometry("1060x400")
+        self.geometry("1280x560")
         self.configure(bg="#f8fafc")
         self.resizable(True, True)
 
         self._is_updating = False
         self._last_source_model = None
+        self._pending_model = None
+        self._update_job = None
+        self._var_values = {}
+        self._preview_color = None
+        self._gamut_shown = False
+        self._update_times = deque()
+        self.conversions = get_shared_cache()
 
         style = ttk.Style(self)
         style.configure("TLabel", background="#f1f5f9", font=("Inter", 10))
@@ -39,6 +65,18 @@ class ColorConverterApp(tk.Tk):
         ttk.Button(top_panel, text="Выберите цвет",
                 command=self._open_color_picker).pack(side="left")
 
+        image_panel = ttk.Frame(main_frame, style="Main.TFrame")
+        image_panel.pack(fill="x", pady=(0, 10))
+
+        self.image_target = tk.StringVar(value="CMYK")
+        ttk.Combobox(image_panel, textvariable=self.image_target,
+                     values=tuple(title for _, title, _ in MODEL_PANELS), state="readonly", width=6).pack(side="left", padx=(0, 10))
+        self.image_button = ttk.Button(image_panel, text="Преобразовать изображение",
+                                       command=self._convert_image_file)
+        self.image_button.pack(side="left")
+        self.image_status = ttk.Label(image_panel, text="", style="Subheader.TLabel")
+        self.image_status.pack(side="left", padx=10)
+
         self.gamut_warning = ttk.Label(main_frame,
                                     text="Внимание: Цвет был скорректирован!",
                                     style="Warning.TLabel", padding=10, wraplength=700)
@@ -54,31 +92,19 @@ class ColorConverterApp(tk.Tk):
         models_panel = ttk.Frame(main_frame, style="Main.TFrame")
         models_panel.pack(fill="both", expand=True)
 
-        models_panel.columnconfigure((0, 1, 2), weight=1)
-
-        self.vars = {
-            "rgb": {"r": tk.DoubleVar(), "g": tk.DoubleVar(), "b": tk.DoubleVar()},
-            "cmyk": {"c": tk.DoubleVar(), "m": tk.DoubleVar(), "y": tk.DoubleVar(), "k": tk.DoubleVar()},
-            "xyz": {"x": tk.DoubleVar(), "y": tk.DoubleVar(), "z": tk.DoubleVar()}
-        }
-
-        self.ranges = {
-            "rgb": {"r": (0, 255), "g": (0, 255), "b": (0, 255)},
-            "cmyk": {"c": (0, 100), "m": (0, 100), "y": (0, 100), "k": (0, 100)},
-            "xyz": {"x": (0, 95), "y": (0, 100), "z": (0, 110)}
-        }
+        models_panel.columnconfigure((0, 1, 2, 3), weight=1)
 
-        self._create_model_frame(models_panel, "RGB", "rgb",
-            [("R", 0, 255), ("G", 0, 255), ("B", 0, 255)]
-        ).grid(row=0, column=0, padx=10, pady=5, sticky="nsew")
+        self.vars = {}
+        self.ranges = {}
+        for index, (model_name, title, components) in enumerate(MODEL_PANELS):
+            self.vars[model_name] = {comp.lower(): tk.DoubleVar() for comp, _, _ in components}
+            self.ranges[model_name] = {comp.lower(): (min_val, max_val) for comp, min_val, max_val in components}
+            self._create_model_frame(models_panel, title, model_name, components
+            ).grid(row=index // 4, column=index % 4, padx=10, pady=5, sticky="nsew")
 
-        self._create_model_frame(models_panel, "CMYK", "cmyk",
-            [("C", 0, 100), ("M", 0, 100), ("Y", 0, 100), ("K", 0, 100)]
-        ).grid(row=0, column=1, padx=10, pady=5, sticky="nsew")
-
-        self._create_model_frame(models_panel, "XYZ", "xyz",
-            [("X", 0, 95), ("Y", 0, 100), ("Z", 0, 110)]
-        ).grid(row=0, column=2, padx=10, pady=5, sticky="nsew")
+        self.rate_label = ttk.Label(main_frame, text="", style="Subheader.TLabel")
+        self.rate_label.pack(anchor="e", pady=(5, 0))
+        self.after(1000, self._refresh_rate_label)
 
     def _create_model_frame(self, parent, title, model_name, components):
         frame = ttk.Frame(parent, padding=15, relief="groove", borderwidth=1)
@@ -90,20 +116,67 @@ class ColorConverterApp(tk.Tk):
             ttk.Label(row, text=comp, width=4).pack(side="left")
             var = self.vars[model_name][comp.lower()]
             slider = ttk.Scale(row, from_=min_val, to=max_val, variable=var, orient="horizontal",
-                               command=lambda e, m=model_name: self._on_slider_change(m))
+                               command=lambda e, m=model_name, c=comp.lower(): self._on_slider_change(m, c))
             slider.pack(side="left", fill="x", expand=True, padx=10)
             entry = ttk.Entry(row, textvariable=var, width=8)
             entry.pack(side="left")
             entry.bind("<Return>", lambda e, m=model_name, c=comp.lower(): self._validate_and_update(m, c))
+            for sequence in ("<KeyRelease>", "<<Paste>>", "<<PasteSelection>>"):
+                entry.bind(sequence, lambda e, m=model_name, c=comp.lower(): self._forget_var(m, c), add="+")
         return frame
 
-    def _on_slider_change(self, model_name):
-        self.range_warning.pack_forget()
-        self.update_all(model_name)
+    def _on_slider_change(self, model_name, component):
+        self._forget_var(model_name, component)
+        self._pending_model = model_name
+        if self._update_job is None:
+            self._update_job = self.after(FRAME_INTERVAL_MS, self._flush_slider_update)
+
+    def _flush_slider_update(self):
+        self._update_job = None
+        model_name, self._pending_model = self._pending_model, None
+        if model_name:
+            self.range_warning.pack_forget()
+            self.update_all(model_name)
+
+    @property
+    def updates_per_second(self):
+        cutoff = time.perf_counter() - RATE_WINDOW
+        while self._update_times and self._update_times[0] < cutoff:
+            self._update_times.popleft()
+        return len(self._update_times) / RATE_WINDOW
+
+    def _refresh_rate_label(self):
+        self.rate_label.config(text=f"Обновлений в секунду: {self.updates_per_second:.0f}")
+        self.after(1000, self._refresh_rate_label)
+
+    def _read_var(self, model_name, component):
+        value = self.vars[model_name][component].get()
+        self._var_values[(model_name, component)] = value
+        return value
+
+    def _set_var(self, model_name, component, value):
+        # _var_values holds what each variable is known to contain, so an unchanged value
+        # costs no Tcl call; sliders and Entry edits drop their copy through _forget_var
+        key = (model_name, component)
+        if self._var_values.get(key) != value:
+            self._var_values[key] = value
+            self.vars[model_name][component].set(value)
+
+    def _forget_var(self, model_name, component):
+        self._var_values.pop((model_name, component), None)
+
+    def _show_gamut_warning(self, show):
+        if show == self._gamut_shown:
+            return
+        self._gamut_shown = show
+        if show:
+            self.gamut_warning.pack(pady=5, fill="x")
+        else:
+            self.gamut_warning.pack_forget()
 
     def _validate_and_update(self, model_name, component):
         try:
-            value = self.vars[model_name][component].get()
+            value = self._read_var(model_name, component)
             min_val, max_val = self.ranges[model_name][component]
             
             if min_val <= value <= max_val:
@@ -115,6 +188,7 @@ class ColorConverterApp(tk.Tk):
                 self.range_warning.pack(pady=5, fill="x")
                 
         except (ValueError, tk.TclError):
+            self._forget_var(model_name, component)
             warning_text = f"Введите числовое значение для {model_name.upper()} {component.upper()}!"
             self.range_warning.config(text=warning_text)
             self.range_warning.pack(pady=5, fill="x")
@@ -125,73 +199,49 @@ class ColorConverterApp(tk.Tk):
             self.range_warning.pack_forget()  
             self.update_all("hex", hex_color)
 
-    @staticmethod
-    def _rgb_to_cmyk(r, g, b):
-        if r == 0 and g == 0 and b == 0: 
-            return 0, 0, 0, 100
-        r_, g_, b_ = r / 255, g / 255, b / 255
-        k = 1 - max(r_, g_, b_)
-        if k == 1: 
-            return 0, 0, 0, 100
-        c = (1 - r_ - k) / (1 - k)
-        m = (1 - g_ - k) / (1 - k)
-        y = (1 - b_ - k) / (1 - k)
-        return c * 100, m * 100, y * 100, k * 100
-
-    @staticmethod
-    def _cmyk_to_rgb(c, m, y, k):
-        c, m, y, k = c / 100, m / 100, y / 100, k / 100
-        r = 255 * (1 - c) * (1 - k)
-        g = 255 * (1 - m) * (1 - k)
-        b = 255 * (1 - y) * (1 - k)
-        return r, g, b
-
-    @staticmethod
-    def _rgb_to_xyz(r, g, b):
-        r, g, b = r / 255, g / 255, b / 255
-
-        def linearize(val):
-            return ((val + 0.055) / 1.055) ** 2.4 if val > 0.04045 else val / 12.92
-
-        r_lin, g_lin, b_lin = map(linearize, [r, g, b])
-        x = r_lin * 0.4124564 + g_lin * 0.3575761 + b_lin * 0.1804375
-        y = r_lin * 0.2126729 + g_lin * 0.7151522 + b_lin * 0.0721750
-        z = r_lin * 0.0193339 + g_lin * 0.1191920 + b_lin * 0.9503041
-        return x * 100, y * 100, z * 100
-
-    def _xyz_to_rgb(self, x, y, z):
-        x, y, z = x / 100, y / 100, z / 100
-        r_lin = x * 3.2404542 - y * 1.5371385 - z * 0.4985314
-        g_lin = x * -0.9692660 + y * 1.8760108 + z * 0.0415560
-        b_lin = x * 0.0556434 - y * 0.2040259 + z * 1.0572252
-
-        def correct_gamma(val):
-            return (1.055 * val ** (1 / 2.4) - 0.055) if val > 0.0031308 else 12.92 * val
-
-        r, g, b = map(correct_gamma, [r_lin, g_lin, b_lin])
-        is_out_of_gamut = False
-
-        def clamp(val):
-            nonlocal is_out_of_gamut
-            if val < 0: 
-                is_out_of_gamut = True
-                return 0
-            if val > 1: 
-                is_out_of_gamut = True
-                return 1
-            return val
-        
-        r, g, b = map(clamp, [r, g, b])
-        if is_out_of_gamut:
-            self.gamut_warning.pack(pady=5, fill="x")
-        else:
-            self.gamut_warning.pack_forget()
-        return r * 255, g * 255, b * 255
+    def _convert_image_file(self):
+        input_path = filedialog.askopenfilename(
+            title="Исходное изображение",
+            filetypes=[("Изображения", "*.png *.jpg *.jpeg *.tif *.tiff *.bmp *.npy"), ("Все файлы", "*.*")])
+        if not input_path:
+            return
+        target = self.image_target.get().lower()
+        output_path = filedialog.asksaveasfilename(
+            title="Сохранить результат", defaultextension=".tif",
+            filetypes=[("TIFF", "*.tif *.tiff"), ("NumPy", "*.npy")])
+        if not output_path:
+            return
+
+        self.image_button.config(state="disabled")
+        self.image_status.config(text="Обработка...")
+        thread = threading.Thread(target=self._run_image_conversion, args=(input_path, output_path, target))
+        thread.daemon = True
+        thread.start()
+
+    def _run_image_conversion(self, input_path, output_path, target):
+        def progress(done, total):
+            self.after(0, lambda: self.image_status.config(text=f"Тайлов: {done}/{total}"))
+
+        try:
+            # NumPy is only needed for whole-image conversion
+            from image_convert import convert_image
+
+            width, height, clipped = convert_image(input_path, output_path, target, on_progress=progress)
+            message = f"Готово: {width}x{height} -> {target.upper()}"
+            if clipped:
+                message += f", скорректировано {clipped} пикселей"
+        except Exception as e:
+            message = f"Ошибка: {e}"
+        self.after(0, lambda: self._finish_image_conversion(message))
 
-    @staticmethod
-    def _hex_to_rgb(hex_color):
-        hex_color = hex_color.lstrip('#')
-        return tuple(int(hex_color[i:i + 2], 16) for i in (0, 2, 4))
+    def _finish_image_conversion(self, message):
+        self.image_status.config(text=message)
+        self.image_button.config(state="normal")
+
+    _rgb_to_cmyk = staticmethod(colorconv.rgb_to_cmyk)
+    _cmyk_to_rgb = staticmethod(colorconv.cmyk_to_rgb)
+    _rgb_to_xyz = staticmethod(colorconv.rgb_to_xyz)
+    _hex_to_rgb = staticmethod(colorconv.hex_to_rgb)
 
     def update_all(self, source_model, source_value=None):
         if self._is_updating: 
@@ -199,57 +249,37 @@ class ColorConverterApp(tk.Tk):
         
         self._is_updating = True
         self._last_source_model = source_model
-        
-        rgb, cmyk, xyz = (0, 0, 0), (0, 0, 0, 100), (0, 0, 0)
+        self._update_times.append(time.perf_counter())
 
         try:
             if source_model == 'hex':
-                rgb = self._hex_to_rgb(source_value)
-                cmyk = self._rgb_to_cmyk(*rgb)
-                xyz = self._rgb_to_xyz(*rgb)
-            elif source_model == 'rgb':
-                rgb = (self.vars['rgb']['r'].get(), self.vars['rgb']['g'].get(), self.vars['rgb']['b'].get())
-                cmyk = self._rgb_to_cmyk(*rgb)
-                xyz = self._rgb_to_xyz(*rgb)
-            elif source_model == 'cmyk':
-                cmyk_vals = (
-                    self.vars['cmyk']['c'].get(), 
-                    self.vars['cmyk']['m'].get(), 
-                    self.vars['cmyk']['y'].get(),
-                    self.vars['cmyk']['k'].get()
-                )
-                rgb = self._cmyk_to_rgb(*cmyk_vals)
-                cmyk = cmyk_vals
-                xyz = self._rgb_to_xyz(*rgb)
-            elif source_model == 'xyz':
-                xyz = (self.vars['xyz']['x'].get(), self.vars['xyz']['y'].get(), self.vars['xyz']['z'].get())
-                rgb = self._xyz_to_rgb(*xyz)
-                cmyk = self._rgb_to_cmyk(*rgb)
-
-            if source_model != 'cmyk':
-                self.vars['rgb']['r'].set(round(rgb[0]))
-                self.vars['rgb']['g'].set(round(rgb[1]))
-                self.vars['rgb']['b'].set(round(rgb[2]))
-                self.vars['cmyk']['c'].set(round(cmyk[0], 1))
-                self.vars['cmyk']['m'].set(round(cmyk[1], 1))
-                self.vars['cmyk']['y'].set(round(cmyk[2], 1))
-                self.vars['cmyk']['k'].set(round(cmyk[3], 1))
-                self.vars['xyz']['x'].set(round(xyz[0], 2))
-                self.vars['xyz']['y'].set(round(xyz[1], 2))
-                self.vars['xyz']['z'].set(round(xyz[2], 2))
+                source, values = 'rgb', self._hex_to_rgb(source_value)
             else:
-                self.vars['rgb']['r'].set(round(rgb[0]))
-                self.vars['rgb']['g'].set(round(rgb[1]))
-                self.vars['rgb']['b'].set(round(rgb[2]))
-                self.vars['xyz']['x'].set(round(xyz[0], 2))
-                self.vars['xyz']['y'].set(round(xyz[1], 2))
-                self.vars['xyz']['z'].set(round(xyz[2], 2))
-
+                source = source_model
+                values = tuple(self._read_var(source, comp) for comp in self.vars[source])
+
+            results = {source: values}
+            is_out_of_gamut = False
+            for model in self.vars:
+                if model != source:
+                    results[model], out_of_gamut = self.conversions.convert(source, model, *values)
+                    is_out_of_gamut = is_out_of_gamut or out_of_gamut
+
+            for model, components in self.vars.items():
+                # the edited model keeps its exact values, except RGB which is always shown as integers
+                if model == source and model != 'rgb':
+                    continue
+                digits = PRECISION[model]
+                for comp, value in zip(components, results[model]):
+                    self._set_var(model, comp, round(value) if digits is None else round(value, digits))
+
+            rgb = results['rgb']
             hex_color = f"#{int(rgb[0]):02x}{int(rgb[1]):02x}{int(rgb[2]):02x}"
-            self.color_preview.config(bg=hex_color)
+            if hex_color != self._preview_color:
+                self._preview_color = hex_color
+                self.color_preview.config(bg=hex_color)
 
-            if source_model != 'xyz':
-                self.gamut_warning.pack_forget()
+            self._show_gamut_warning(is_out_of_gamut)
                 
         except Exception as e:
             print(f"Error in update_all: {e}")
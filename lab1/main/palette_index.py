@@ -0,0 +1,131 @@
+import numpy as np
+
+import color_batch
+
+CELL_POINTS = 2.0
+MAX_TABLE_SIZE = 1 << 25
+QUERY_CHUNK = 8192
+
+NEIGHBOR_OFFSETS = np.stack(np.meshgrid([-1, 0, 1], [-1, 0, 1], [-1, 0, 1], indexing="ij"), axis=-1).reshape(-1, 3)
+
+
+class PaletteIndex:
+    # Uniform voxel grid over Lab, nearest color by CIE76 (Euclidean distance in Lab).
+    # Every cell stores the palette entries of its 3x3x3 neighborhood, so a query is a single
+    # gather; queries whose neighborhood cannot prove the answer fall back to a full scan.
+    def __init__(self, palette, source="rgb", cell_points=CELL_POINTS):
+        lab, _ = color_batch.convert(palette, source, "lab")
+        self.lab = lab.reshape(-1, 3)
+        if not len(self.lab):
+            raise ValueError("Палитра пуста")
+
+        self.origin = self.lab.min(axis=0)
+        self.extent = np.maximum(self.lab.max(axis=0) - self.origin, 1e-9)
+        count = len(self.lab)
+        cell = max((self.extent.prod() * cell_points / count) ** (1 / 3), self.extent.max() * cell_points / count)
+        # the bounding box is mostly empty, so tune the cell size by the occupied cells
+        for _ in range(4):
+            self._grid(cell)
+            occupied = np.count_nonzero(self.cell_count)
+            cell *= (cell_points * occupied / count) ** (1 / 3)
+        self._grid(cell)
+        self._build_table()
+        while self.table.size > MAX_TABLE_SIZE:
+            self._grid(self.cell * 1.25)
+            self._build_table()
+
+    def __len__(self):
+        return len(self.lab)
+
+    def _grid(self, cell):
+        self.cell = cell
+        self.dims = (self.extent // cell).astype(np.intp) + 1
+        self.strides = np.array([self.dims[1] * self.dims[2], self.dims[2], 1])
+        ids = self._cells(self.lab) @ self.strides
+        self.order = np.argsort(ids, kind="stable")
+        self.sorted_lab = self.lab[self.order]
+        self.cell_count = np.bincount(ids, minlength=int(np.prod(self.dims)))
+        self.cell_start = np.cumsum(self.cell_count) - self.cell_count
+
+    def _cells(self, lab):
+        cells = np.floor((lab - self.origin) / self.cell).astype(np.intp)
+        return np.clip(cells, 0, self.dims - 1, out=cells)
+
+    def _build_table(self):
+        cells = np.stack(np.unravel_index(np.arange(len(self.cell_count)), self.dims), axis=1)
+        starts, counts = [], []
+        for offset in NEIGHBOR_OFFSETS:
+            neighbors = cells + offset
+            inside = ((neighbors >= 0) & (neighbors < self.dims)).all(axis=1)
+            ids = np.where(inside, np.clip(neighbors, 0, self.dims - 1) @ self.strides, 0)
+            starts.append(self.cell_start[ids])
+            counts.append(np.where(inside, self.cell_count[ids], 0))
+
+        self.neighbor_count = sum(counts)
+        width = max(int(self.neighbor_count.max()), 1)
+        self.table = np.full((len(cells), width), -1, dtype=np.intp)
+        self.widths = 1 << np.arange(int(width - 1).bit_length() + 1)
+        self.widths[-1] = width
+        filled = np.zeros(len(cells), dtype=np.intp)
+        for start, count in zip(starts, counts):
+            for j in range(count.max()):
+                rows = np.flatnonzero(count > j)
+                self.table[rows, filled[rows]] = start[rows] + j
+                filled[rows] += 1
+
+    def _nearest_candidates(self, lab, ids, width):
+        candidates = self.table[ids, :width]
+        diff = self.sorted_lab[candidates] - lab[:, None, :]
+        distance = np.einsum("qkc,qkc->qk", diff, diff)
+        distance[candidates < 0] = np.inf
+        best = distance.argmin(axis=1)
+        rows = np.arange(len(lab))
+        return self.order[candidates[rows, best]], distance[rows, best]
+
+    def _query_chunk(self, lab):
+        cells = self._cells(lab)
+        ids = cells @ self.strides
+        indices = np.empty(len(lab), dtype=np.intp)
+        best_distance = np.empty(len(lab))
+        # rows are filled from the left, so queries are grouped by neighborhood size
+        # and each group reads only as many columns as it needs
+        buckets = np.searchsorted(self.widths, self.neighbor_count[ids])
+        for bucket in np.unique(buckets):
+            rows = np.flatnonzero(buckets == bucket)
+            indices[rows], best_distance[rows] = self._nearest_candidates(lab[rows], ids[rows], self.widths[bucket])
+
+        # anything outside the 3x3x3 block is at least this far away
+        low = (cells - 1) * self.cell + self.origin
+        high = (cells + 2) * self.cell + self.origin
+        margin = np.minimum(lab - low, high - lab).min(axis=1)
+        covered = ((cells <= 1) & (cells >= self.dims - 2)).all(axis=1)
+        unresolved = ~(covered | ((margin >= 0) & (margin * margin >= best_distance)))
+
+        distances = np.sqrt(best_distance)
+        if unresolved.any():
+            indices[unresolved], distances[unresolved] = color_batch.nearest_colors(lab[unresolved], self.lab)
+        return indices, distances
+
+    def query_lab(self, lab, chunk=QUERY_CHUNK):
+        lab = np.asarray(lab, dtype=np.float64)
+        flat = lab.reshape(-1, 3)
+        indices = np.empty(len(flat), dtype=np.intp)
+        distances = np.empty(len(flat))
+        for start in range(0, len(flat), chunk):
+            indices[start:start + chunk], distances[start:start + chunk] = self._query_chunk(flat[start:start + chunk])
+        return indices.reshape(lab.shape[:-1]), distances.reshape(lab.shape[:-1])
+
+    def query(self, colors, source="rgb", chunk=QUERY_CHUNK):
+        colors = np.asarray(colors)
+        if source == "rgb" and colors.dtype == np.uint8:
+            # images repeat colors a lot, so every distinct 24-bit value is matched once
+            flat = colors.reshape(-1, 3).astype(np.uint32)
+            packed = (flat[:, 0] << 16) | (flat[:, 1] << 8) | flat[:, 2]
+            unique, inverse = np.unique(packed, return_inverse=True)
+            unique_rgb = np.stack([unique >> 16, (unique >> 8) & 255, unique & 255], axis=1).astype(np.uint8)
+            indices, distances = self.query_lab(color_batch.rgb_to_lab(unique_rgb), chunk)
+            shape = colors.shape[:-1]
+            return indices[inverse].reshape(shape), distances[inverse].reshape(shape)
+
+        lab, _ = color_batch.convert(colors, source, "lab")
+        return self.query_lab(lab, chunk)
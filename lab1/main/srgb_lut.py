@@ -0,0 +1,57 @@
+LUT_SIZE = 4096
+
+
+def linearize(val):
+    return ((val + 0.055) / 1.055) ** 2.4 if val > 0.04045 else val / 12.92
+
+
+def correct_gamma(val):
+    return (1.055 * val ** (1 / 2.4) - 0.055) if val > 0.0031308 else 12.92 * val
+
+
+LINEAR_8BIT = [linearize(i / 255) for i in range(256)]
+_LAST = LUT_SIZE - 1
+_LUTS = {"LINEAR_LUT": linearize, "GAMMA_LUT": correct_gamma}
+
+
+# The interpolated tables cost more to build than the rest of the import, and the scalar
+# converters never use them, so they are built on first access.
+def __getattr__(name):
+    if name not in _LUTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    func = _LUTS[name]
+    table = globals()[name] = [func(i / _LAST) for i in range(LUT_SIZE)]
+    return table
+
+
+def linearize_8bit(value):
+    index = int(value)
+    if index == value and 0 <= index <= 255:
+        return LINEAR_8BIT[index]
+    return linearize(value / 255)
+
+
+# Interpolated tables for arbitrary values in [0, 1]. In CPython a single ** is cheaper than
+# the interpolation, so the converters use the exact formulas and keep only the 8-bit table.
+def linearize_interp(val):
+    if not 0 <= val <= 1:
+        return linearize(val)
+    table = globals().get("LINEAR_LUT") or __getattr__("LINEAR_LUT")
+    pos = val * _LAST
+    index = int(pos)
+    if index >= _LAST:
+        return table[_LAST]
+    low = table[index]
+    return low + (table[index + 1] - low) * (pos - index)
+
+
+def correct_gamma_interp(val):
+    if not 0 <= val <= 1:
+        return correct_gamma(val)
+    table = globals().get("GAMMA_LUT") or __getattr__("GAMMA_LUT")
+    pos = val * _LAST
+    index = int(pos)
+    if index >= _LAST:
+        return table[_LAST]
+    low = table[index]
+    return low + (table[index + 1] - low) * (pos - index)
@@ -0,0 +1,119 @@
+import struct
+
+import numpy as np
+
+TYPE_FORMATS = {3: "H", 4: "I"}
+PHOTOMETRIC_MODELS = {2: "rgb", 5: "cmyk"}
+
+
+def _read_ifd(f):
+    header = f.read(8)
+    if header[0:4] == b"II*\0":
+        order = "<"
+    elif header[0:4] == b"MM\0*":
+        order = ">"
+    else:
+        return None
+    f.seek(struct.unpack_from(order + "I", header, 4)[0])
+    count = struct.unpack(order + "H", f.read(2))[0]
+    entries = f.read(count * 12)
+
+    tags = {}
+    for i in range(len(entries) // 12):
+        tag, field_type, value_count = struct.unpack_from(order + "HHI", entries, i * 12)
+        code = TYPE_FORMATS.get(field_type)
+        if code is None:
+            continue
+        raw = entries[i * 12 + 8:i * 12 + 12]
+        size = struct.calcsize(code) * value_count
+        if size > 4:
+            f.seek(struct.unpack(order + "I", raw)[0])
+            raw = f.read(size)
+            if len(raw) < size:
+                return None
+        tags[tag] = list(struct.unpack(order + code * value_count, raw[:size]))
+    return tags
+
+
+class TiffChunks:
+    # Uncompressed, interleaved 8-bit RGB(A) or CMYK TIFF read region by region straight
+    # from the file: strips laid out back to back become one memory map, anything else
+    # is read row by row from strips or tile by tile. open() returns None for files
+    # that cannot be read this way (compressed, planar, other depths or photometrics).
+    def __init__(self, path, tags):
+        self.path = path
+        self.width, self.height = tags[256][0], tags[257][0]
+        self.samples = tags.get(277, [3])[0]
+        self.model = PHOTOMETRIC_MODELS[tags[262][0]]
+        self.channels = 4 if self.model == "cmyk" else 3
+        self.file = open(path, "rb")
+        self.array = None
+
+        if 322 in tags:
+            self.tile_width, self.tile_height = tags[322][0], tags[323][0]
+            self.tile_offsets = tags[324]
+            self.tiles_across = -(-self.width // self.tile_width)
+            return
+
+        self.tile_width = None
+        self.rows_per_strip = min(tags.get(278, [self.height])[0], self.height)
+        self.strip_offsets = tags[273]
+        row_bytes = self.width * self.samples
+        contiguous = all(offset == self.strip_offsets[0] + i * self.rows_per_strip * row_bytes
+                         for i, offset in enumerate(self.strip_offsets))
+        if contiguous:
+            self.array = np.memmap(path, dtype=np.uint8, mode="r", offset=self.strip_offsets[0],
+                                   shape=(self.height, self.width, self.samples))
+
+    @classmethod
+    def open(cls, path):
+        with open(path, "rb") as f:
+            tags = _read_ifd(f)
+        if not tags or 256 not in tags or 257 not in tags:
+            return None
+        samples = tags.get(277, [1])[0]
+        photometric = tags.get(262, [None])[0]
+        readable = (
+            tags.get(259, [1])[0] == 1
+            and tags.get(284, [1])[0] == 1
+            and all(bits == 8 for bits in tags.get(258, [1]))
+            and (photometric == 2 and samples in (3, 4) or photometric == 5 and samples == 4)
+            and (273 in tags or all(tag in tags for tag in (322, 323, 324)))
+        )
+        return cls(path, tags) if readable else None
+
+    def read(self, y, x, h, w):
+        if self.array is not None:
+            region = np.array(self.array[y:y + h, x:x + w])
+        elif self.tile_width is None:
+            region = self._read_strips(y, x, h, w)
+        else:
+            region = self._read_tiles(y, x, h, w)
+        return region[:, :, :self.channels]
+
+    def _read_strips(self, y, x, h, w):
+        region = np.empty((h, w, self.samples), dtype=np.uint8)
+        row_bytes = self.width * self.samples
+        for row in range(y, y + h):
+            strip, row_in_strip = divmod(row, self.rows_per_strip)
+            self.file.seek(self.strip_offsets[strip] + row_in_strip * row_bytes + x * self.samples)
+            self.file.readinto(region[row - y])
+        return region
+
+    def _read_tiles(self, y, x, h, w):
+        region = np.empty((h, w, self.samples), dtype=np.uint8)
+        tw, th = self.tile_width, self.tile_height
+        tile_bytes = tw * th * self.samples
+        for ty in range(y // th, (y + h - 1) // th + 1):
+            for tx in range(x // tw, (x + w - 1) // tw + 1):
+                self.file.seek(self.tile_offsets[ty * self.tiles_across + tx])
+                tile = np.frombuffer(self.file.read(tile_bytes), dtype=np.uint8).reshape(th, tw, self.samples)
+                top, left = max(y, ty * th), max(x, tx * tw)
+                bottom, right = min(y + h, (ty + 1) * th), min(x + w, (tx + 1) * tw)
+                region[top - y:bottom - y, left - x:right - x] = \
+                    tile[top - ty * th:bottom - ty * th, left - tx * tw:right - tx * tw]
+        return region
+
+    def close(self):
+        self.file.close()
+        self.array = None
@@ -0,0 +1,84 @@
+import argparse
+import os
+import shutil
+import struct
+import sys
+import tempfile
+import time
+import zlib
+
+from scanner import scan_folder, EXECUTOR_MODES
+
+
+def make_synthetic_folder(folder, count):
+    def png_chunk(chunk_type, data):
+        return struct.pack('>I', len(data)) + chunk_type + data + struct.pack('>I', zlib.crc32(chunk_type + data))
+
+    payload = os.urandom(256 * 1024)
+    for i in range(count):
+        width, height = 100 + i % 900, 100 + i % 700
+        if i % 2:
+            sof = struct.pack('>BHHB', 8, height, width, 3) + b'\x01\x22\x00' * 3
+            data = (b'\xff\xd8\xff\xe1' + struct.pack('>H', 4002) + b'\0' * 4000
+                    + b'\xff\xc0' + struct.pack('>H', len(sof) + 2) + sof + b'\xff\xda\x00\x02' + payload)
+            name = f"img_{i:06d}.jpg"
+        else:
+            data = (b'\x89PNG\r\n\x1a\n'
+                    + png_chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0))
+                    + png_chunk(b'IDAT', payload) + png_chunk(b'IEND', b''))
+            name = f"img_{i:06d}.png"
+        with open(os.path.join(folder, name), 'wb') as f:
+            f.write(data)
+
+
+def run_case(folder, mode, workers, batch_size):
+    start = time.perf_counter()
+    count = sum(1 for _ in scan_folder(folder, max_workers=workers, mode=mode, batch_size=batch_size))
+    return count, time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Зависимость скорости сканирования от числа ядер")
+    parser.add_argument("folder", nargs="?", help="папка с изображениями (иначе создаются синтетические файлы)")
+    parser.add_argument("--synthetic", type=int, default=2000, help="число синтетических файлов")
+    parser.add_argument("--modes", default=",".join(EXECUTOR_MODES))
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 4)
+    parser.add_argument("--batch-size", type=int, default=None)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    temp_dir = None
+    folder = args.folder
+    if folder is None:
+        temp_dir = tempfile.mkdtemp(prefix="scan_bench_")
+        make_synthetic_folder(temp_dir, args.synthetic)
+        folder = temp_dir
+
+    workers_list = []
+    workers = 1
+    while workers < args.max_workers:
+        workers_list.append(workers)
+        workers *= 2
+    workers_list.append(args.max_workers)
+
+    try:
+        print(f"{'mode':<8} {'workers':>7} {'files':>7} {'best, s':>9} {'files/s':>10} {'speedup':>8}")
+        for mode in args.modes.split(","):
+            baseline = None
+            for workers in workers_list:
+                best = None
+                count = 0
+                for _ in range(args.repeat):
+                    count, elapsed = run_case(folder, mode, workers, args.batch_size)
+                    best = elapsed if best is None else min(best, elapsed)
+                rate = count / best if best else 0
+                baseline = baseline or rate
+                print(f"{mode:<8} {workers:>7} {count:>7} {best:>9.3f} {rate:>10.0f} {rate / baseline:>7.2f}x")
+    finally:
+        if temp_dir:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,336 @@
+import io
+import os
+import struct
+from collections import namedtuple
+
+SEGMENT_READ_LIMIT = 8 * 1024
+
+HeaderInfo = namedtuple("HeaderInfo", "width height dpi bits color_type compression")
+
+
+def probe_header(path):
+    file_ext = os.path.splitext(path)[1].lower()
+    parser = PARSERS.get(file_ext)
+    try:
+        with open(path, 'rb') as f:
+            if parser is not None:
+                info = parser(f)
+                if info is not None:
+                    return info
+            f.seek(0)
+            magic = f.read(8)
+            for sniff, sniff_parser in SIGNATURES:
+                if magic.startswith(sniff) and sniff_parser is not parser:
+                    f.seek(0)
+                    return sniff_parser(f)
+    except (OSError, struct.error, ValueError, ZeroDivisionError):
+        pass
+    return None
+
+
+def _ppm_to_dpi(ppm):
+    return ppm * 0.0254
+
+
+def parse_bmp(f):
+    header = f.read(54)
+    if len(header) < 26 or header[0:2] != b'BM':
+        return None
+    dib_size = struct.unpack_from('<I', header, 14)[0]
+    if dib_size == 12:
+        width, height, _, bit_count = struct.unpack_from('<HHHH', header, 18)
+        return HeaderInfo(width, height, None, bit_count, _bmp_color_type(bit_count), "BMP")
+
+    width, height, _, bit_count, compression = struct.unpack_from('<iiHHI', header, 18)
+    ppm_x, ppm_y = struct.unpack_from('<ii', header, 38) if len(header) >= 46 else (0, 0)
+    dpi = None
+    if ppm_x > 0 and ppm_y > 0:
+        dpi = (_ppm_to_dpi(ppm_x), _ppm_to_dpi(ppm_y))
+    compression_map = {0: "BMP", 1: "RLE8", 2: "RLE4", 3: "Bitfields", 4: "JPEG", 5: "PNG", 6: "Bitfields"}
+    return HeaderInfo(abs(width), abs(height), dpi, bit_count, _bmp_color_type(bit_count),
+                      compression_map.get(compression, f"BMP ({compression})"))
+
+
+def _bmp_color_type(bit_count):
+    if bit_count <= 8:
+        return f"Indexed ({1 << bit_count} colors)"
+    if bit_count == 32:
+        return "BGRA"
+    return "BGR"
+
+
+PNG_COLOR_TYPES = {0: ("Grayscale", 1), 2: ("RGB", 3), 3: ("Indexed", 1), 4: ("Grayscale+Alpha", 2), 6: ("RGBA", 4)}
+
+
+def parse_png(f):
+    header = f.read(33)
+    if len(header) < 33 or header[0:8] != b'\x89PNG\r\n\x1a\n' or header[12:16] != b'IHDR':
+        return None
+    width, height, bit_depth, color_type = struct.unpack_from('>IIBB', header, 16)
+    name, channels = PNG_COLOR_TYPES.get(color_type, (f"type {color_type}", 1))
+    if color_type == 3:
+        name = f"Indexed ({1 << bit_depth} colors)"
+
+    dpi = None
+    while True:
+        chunk = f.read(8)
+        if len(chunk) < 8:
+            break
+        length, chunk_type = struct.unpack('>I4s', chunk)
+        if chunk_type == b'pHYs':
+            data = f.read(9)
+            ppu_x, ppu_y, unit = struct.unpack('>IIB', data)
+            if unit == 1 and ppu_x > 0 and ppu_y > 0:
+                dpi = (_ppm_to_dpi(ppu_x), _ppm_to_dpi(ppu_y))
+            break
+        if chunk_type in (b'IDAT', b'IEND'):
+            break
+        f.seek(length + 4, os.SEEK_CUR)
+
+    return HeaderInfo(width, height, dpi, bit_depth * channels, name, "Deflate")
+
+
+SOF_MARKERS = {
+    0xC0: "Baseline", 0xC1: "Extended", 0xC2: "Progressive", 0xC3: "Lossless",
+    0xC5: "Differential", 0xC6: "Differential progressive", 0xC7: "Differential lossless",
+    0xC9: "Arithmetic", 0xCA: "Arithmetic progressive", 0xCB: "Arithmetic lossless",
+    0xCD: "Arithmetic differential", 0xCE: "Arithmetic differential progressive",
+    0xCF: "Arithmetic differential lossless",
+}
+JPEG_COMPONENTS = {1: "Grayscale", 3: "YCbCr", 4: "CMYK"}
+JPEG_HEADER_MARKERS = (0xE0, 0xE1) + tuple(SOF_MARKERS)
+
+
+def iter_jpeg_segments(f, read_markers=()):
+    if f.read(2) != b'\xff\xd8':
+        return
+    while True:
+        prefix = f.read(1)
+        if prefix != b'\xff':
+            return
+        marker = f.read(1)
+        while marker == b'\xff':
+            marker = f.read(1)
+        if not marker:
+            return
+        marker = marker[0]
+        if marker == 0x01 or 0xD0 <= marker <= 0xD7:
+            continue
+        if marker == 0xD9:
+            return
+        length_bytes = f.read(2)
+        if len(length_bytes) < 2:
+            return
+        length = struct.unpack('>H', length_bytes)[0] - 2
+        if length < 0:
+            return
+        if marker in read_markers:
+            payload = f.read(min(length, SEGMENT_READ_LIMIT))
+            if length > len(payload):
+                f.seek(length - len(payload), os.SEEK_CUR)
+            yield marker, payload
+        else:
+            f.seek(length, os.SEEK_CUR)
+            yield marker, None
+        if marker == 0xDA:
+            return
+
+
+def _jfif_dpi(payload):
+    if payload[0:5] != b'JFIF\0' or len(payload) < 12:
+        return None
+    unit, x_density, y_density = struct.unpack_from('>BHH', payload, 7)
+    if not x_density or not y_density:
+        return None
+    if unit == 1:
+        return (x_density, y_density)
+    if unit == 2:
+        return (x_density * 2.54, y_density * 2.54)
+    return None
+
+
+def _exif_dpi(payload):
+    if payload[0:6] != b'Exif\0\0':
+        return None
+    read_values = _open_ifd(io.BytesIO(payload[6:]))
+    if read_values is None:
+        return None
+    return _resolution_dpi(read_values)
+
+
+def read_jpeg_dpi(f):
+    exif_dpi = None
+    for marker, payload in iter_jpeg_segments(f, (0xE0, 0xE1)):
+        if marker == 0xE0:
+            dpi = _jfif_dpi(payload)
+            if dpi:
+                return dpi
+        elif marker == 0xE1 and exif_dpi is None:
+            exif_dpi = _exif_dpi(payload)
+        elif marker in SOF_MARKERS:
+            break
+    return exif_dpi
+
+
+def parse_jpeg(f):
+    jfif_dpi = None
+    exif_dpi = None
+    for marker, payload in iter_jpeg_segments(f, JPEG_HEADER_MARKERS):
+        if marker == 0xE0:
+            jfif_dpi = jfif_dpi or _jfif_dpi(payload)
+        elif marker == 0xE1 and exif_dpi is None:
+            exif_dpi = _exif_dpi(payload)
+        elif marker in SOF_MARKERS:
+            if len(payload) < 6:
+                return None
+            precision, height, width, components = struct.unpack_from('>BHHB', payload, 0)
+            return HeaderInfo(width, height, jfif_dpi or exif_dpi, precision * components,
+                              JPEG_COMPONENTS.get(components, f"{components} channels"),
+                              f"JPEG ({SOF_MARKERS[marker]})")
+    return None
+
+
+def parse_gif(f):
+    header = f.read(13)
+    if len(header) < 13 or header[0:6] not in (b'GIF87a', b'GIF89a'):
+        return None
+    width, height, packed = struct.unpack_from('<HHB', header, 6)
+    bits = (packed & 0x07) + 1
+    return HeaderInfo(width, height, None, bits, f"Indexed ({1 << bits} colors)", "LZW")
+
+
+TIFF_TYPE_SIZES = {1: 1, 2: 1, 3: 2, 4: 4, 5: 8, 6: 1, 7: 1, 8: 2, 9: 4, 10: 8, 11: 4, 12: 8}
+TIFF_TYPE_FORMATS = {1: 'B', 3: 'H', 4: 'I', 6: 'b', 8: 'h', 9: 'i'}
+TIFF_COMPRESSION = {
+    1: "None", 2: "CCITT RLE", 3: "CCITT G3", 4: "CCITT G4", 5: "LZW", 6: "JPEG (old)",
+    7: "JPEG", 8: "Deflate", 32773: "PackBits", 32946: "Deflate", 34712: "JPEG 2000",
+}
+TIFF_PHOTOMETRIC = {0: "Grayscale", 1: "Grayscale", 2: "RGB", 3: "Indexed", 5: "CMYK", 6: "YCbCr", 8: "CIELab"}
+
+
+def _open_ifd(f):
+    header = f.read(8)
+    if header[0:4] == b'II*\0':
+        order = '<'
+    elif header[0:4] == b'MM\0*':
+        order = '>'
+    else:
+        return None
+    ifd_offset = struct.unpack_from(order + 'I', header, 4)[0]
+    f.seek(ifd_offset)
+    count = struct.unpack(order + 'H', f.read(2))[0]
+    entries = f.read(count * 12)
+
+    tags = {}
+    for i in range(min(count, len(entries) // 12)):
+        tag, field_type, value_count = struct.unpack_from(order + 'HHI', entries, i * 12)
+        tags[tag] = (field_type, value_count, entries[i * 12 + 8:i * 12 + 12])
+
+    def read_values(tag, limit=4):
+        if tag not in tags:
+            return None
+        field_type, value_count, raw = tags[tag]
+        size = TIFF_TYPE_SIZES.get(field_type, 1)
+        value_count = min(value_count, limit)
+        if size * value_count > 4:
+            f.seek(struct.unpack(order + 'I', raw)[0])
+            raw = f.read(size * value_count)
+            if len(raw) < size * value_count:
+                return None
+        if field_type in (5, 10):
+            code = 'I' if field_type == 5 else 'i'
+            values = struct.unpack(order + code * (2 * value_count), raw[:8 * value_count])
+            return [values[j] / values[j + 1] if values[j + 1] else 0 for j in range(0, len(values), 2)]
+        code = TIFF_TYPE_FORMATS.get(field_type)
+        if code is None:
+            return None
+        return list(struct.unpack(order + code * value_count, raw[:size * value_count]))
+
+    return read_values
+
+
+def _resolution_dpi(read_values):
+    x_res = read_values(282)
+    y_res = read_values(283)
+    unit = (read_values(296) or [2])[0]
+    if not x_res or not y_res or x_res[0] <= 0 or y_res[0] <= 0:
+        return None
+    if unit == 2:
+        return (x_res[0], y_res[0])
+    if unit == 3:
+        return (x_res[0] * 2.54, y_res[0] * 2.54)
+    return None
+
+
+def parse_tiff(f):
+    read_values = _open_ifd(f)
+    if read_values is None:
+        return None
+
+    width = (read_values(256) or [0])[0]
+    height = (read_values(257) or [0])[0]
+    if not width or not height:
+        return None
+    bits_per_sample = read_values(258, limit=8) or [1]
+    samples = (read_values(277) or [len(bits_per_sample)])[0]
+    if len(bits_per_sample) < samples:
+        bits_per_sample = bits_per_sample * samples
+    compression = (read_values(259) or [1])[0]
+    photometric = (read_values(262) or [None])[0]
+    dpi = _resolution_dpi(read_values)
+
+    color_type = TIFF_PHOTOMETRIC.get(photometric, f"{samples} channels")
+    if photometric == 2 and samples == 4:
+        color_type = "RGBA"
+    elif photometric in (0, 1) and samples == 2:
+        color_type = "Grayscale+Alpha"
+    return HeaderInfo(width, height, dpi, sum(bits_per_sample[:samples]), color_type,
+                      TIFF_COMPRESSION.get(compression, f"TIFF ({compression})"))
+
+
+PCX_VERSIONS = (0, 2, 3, 4, 5)
+PCX_BITS_PER_PLANE = (1, 2, 4, 8)
+
+
+def parse_pcx(f):
+    header = f.read(128)
+    if len(header) < 128 or header[0] != 0x0A:
+        return None
+    version, encoding, bits_per_plane = header[1], header[2], header[3]
+    # a one-byte signature matches any file starting with a newline, so the rest of the
+    # fixed header has to look like PCX too
+    if version not in PCX_VERSIONS or encoding != 1 or bits_per_plane not in PCX_BITS_PER_PLANE:
+        return None
+    x_min, y_min, x_max, y_max, h_dpi, v_dpi = struct.unpack_from('<HHHHHH', header, 4)
+    planes = header[65]
+    bits = bits_per_plane * planes
+    dpi = (h_dpi, v_dpi) if h_dpi and v_dpi else None
+    if bits <= 8:
+        color_type = f"Indexed ({1 << bits} colors)"
+    elif planes == 3:
+        color_type = "RGB"
+    else:
+        color_type = f"{planes} planes"
+    return HeaderInfo(x_max - x_min + 1, y_max - y_min + 1, dpi, bits, color_type, "RLE")
+
+
+PARSERS = {
+    '.bmp': parse_bmp,
+    '.png': parse_png,
+    '.jpg': parse_jpeg,
+    '.jpeg': parse_jpeg,
+    '.gif': parse_gif,
+    '.tif': parse_tiff,
+    '.tiff': parse_tiff,
+    '.pcx': parse_pcx,
+}
+
+SIGNATURES = (
+    (b'\x89PNG', parse_png),
+    (b'\xff\xd8', parse_jpeg),
+    (b'GIF8', parse_gif),
+    (b'BM', parse_bmp),
+    (b'II*\0', parse_tiff),
+    (b'MM\0*', parse_tiff),
+    (b'\x0a', parse_pcx),
+)
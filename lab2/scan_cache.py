@@ -0,0 +1,145 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".image_info_cache.sqlite3")
+DEFAULT_MAX_ENTRIES = 5_000_000
+DEFAULT_MAX_AGE_DAYS = 30
+COMPACT_THRESHOLD = 100_000
+BATCH_SIZE = 1000
+
+
+class ScanCache:
+    def __init__(self, db_path=DEFAULT_CACHE_PATH, max_entries=DEFAULT_MAX_ENTRIES,
+                 max_age_days=DEFAULT_MAX_AGE_DAYS):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.max_age_days = max_age_days
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._pending_puts = []
+        self._pending_touches = []
+        self._scan_started = time.time()
+
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS files ("
+            " path TEXT PRIMARY KEY,"
+            " mtime_ns INTEGER NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " result TEXT NOT NULL,"
+            " last_seen REAL NOT NULL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS files_last_seen ON files(last_seen)")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+        self.conn.commit()
+
+    def begin_scan(self):
+        self._scan_started = time.time()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, path, mtime_ns, size):
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT mtime_ns, size, result FROM files WHERE path = ?", (path,)
+            ).fetchone()
+            if row is None or row[0] != mtime_ns or row[1] != size:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._pending_touches.append((self._scan_started, path))
+            if len(self._pending_touches) >= BATCH_SIZE:
+                self._flush_locked()
+        return tuple(json.loads(row[2]))
+
+    def put(self, path, mtime_ns, size, result):
+        with self._lock:
+            self._pending_puts.append((path, mtime_ns, size, json.dumps(list(result)), self._scan_started))
+            if len(self._pending_puts) >= BATCH_SIZE:
+                self._flush_locked()
+
+    def flush(self):
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        if self._pending_puts:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO files (path, mtime_ns, size, result, last_seen) VALUES (?, ?, ?, ?, ?)",
+                self._pending_puts,
+            )
+            self._pending_puts = []
+        if self._pending_touches:
+            self.conn.executemany("UPDATE files SET last_seen = ? WHERE path = ?", self._pending_touches)
+            self._pending_touches = []
+        self.conn.commit()
+
+    def finish_scan(self, folder):
+        with self._lock:
+            self._flush_locked()
+            removed = self._evict_missing(folder)
+            removed += self._evict_expired()
+            self._add_deleted(removed)
+            self.conn.commit()
+        self.compact()
+        return removed
+
+    def _evict_missing(self, folder):
+        prefix = os.path.join(os.path.abspath(folder), "")
+        upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+        cursor = self.conn.execute(
+            "DELETE FROM files WHERE path >= ? AND path < ? AND last_seen < ?",
+            (prefix, upper, self._scan_started),
+        )
+        return cursor.rowcount
+
+    def _evict_expired(self):
+        removed = 0
+        if self.max_age_days:
+            cutoff = time.time() - self.max_age_days * 86400
+            removed += self.conn.execute("DELETE FROM files WHERE last_seen < ?", (cutoff,)).rowcount
+        if self.max_entries:
+            count = self.conn.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+            excess = count - self.max_entries
+            if excess > 0:
+                removed += self.conn.execute(
+                    "DELETE FROM files WHERE path IN "
+                    "(SELECT path FROM files ORDER BY last_seen LIMIT ?)",
+                    (excess,),
+                ).rowcount
+        return removed
+
+    def _add_deleted(self, removed):
+        if removed:
+            self.conn.execute(
+                "INSERT INTO meta (key, value) VALUES ('deleted', ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = value + excluded.value",
+                (removed,),
+            )
+
+    def compact(self, force=False):
+        with self._lock:
+            row = self.conn.execute("SELECT value FROM meta WHERE key = 'deleted'").fetchone()
+            deleted = row[0] if row else 0
+            if not force and deleted < COMPACT_THRESHOLD:
+                return False
+            self.conn.execute("DELETE FROM meta WHERE key = 'deleted'")
+            self.conn.commit()
+            self.conn.execute("VACUUM")
+        return True
+
+    def close(self):
+        with self._lock:
+            self._flush_locked()
+            self.conn.close()
+
+
+def file_key(path):
+    st = os.stat(path)
+    return st.st_mtime_ns, st.st_size
@@ -0,0 +1,555 @@
+import argparse
+import csv
+import itertools
+import json
+import multiprocessing
+import os
+import queue
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+from PIL import Image
+
+from header_probe import probe_header, read_jpeg_dpi
+from scan_cache import ScanCache, DEFAULT_CACHE_PATH, file_key
+from walker import iter_image_files, DEFAULT_WALKERS
+
+SUPPORTED_FORMATS = (".jpg", ".jpeg", ".gif", ".bmp", ".png", ".tif", ".tiff", ".pcx")
+COLUMNS = ("name", "size", "resolution", "depth", "format")
+DEFAULT_WORKERS = os.cpu_count() or 4
+EXECUTOR_MODES = ("thread", "process")
+DEFAULT_PROCESS_BATCH = 64
+IN_FLIGHT_PER_WORKER = 4
+FOUND_REPORT_EVERY = 100
+WAIT_INTERVAL = 0.1
+
+
+class ScanDeadlineExceeded(Exception):
+    pass
+
+
+# set in each pool process when per-file timeouts are on; batches report their start here
+_started_queue = None
+
+
+def _init_process_worker(started_queue):
+    global _started_queue
+    _started_queue = started_queue
+
+
+def scan_folder(folder, max_workers=DEFAULT_WORKERS, recursive=True, formats=SUPPORTED_FORMATS,
+                cache=None, allow_full_decode=True, on_found=None, should_stop=None,
+                mode="thread", batch_size=None, walkers=DEFAULT_WALKERS, follow_symlinks=False,
+                file_timeout=None, deadline=None, on_idle=None):
+    if mode not in EXECUTOR_MODES:
+        raise ValueError(f"Неизвестный режим: {mode}")
+    if batch_size is None:
+        batch_size = DEFAULT_PROCESS_BATCH if mode == "process" else 1
+
+    folder = os.path.abspath(folder)
+    deadline_at = time.monotonic() + deadline if deadline else None
+    if cache:
+        cache.begin_scan()
+
+    # A process-pool future reports running as soon as it is queued for a worker, so there
+    # the workers report when they really start a batch and file_timeout counts from that.
+    # In a thread pool a future only runs once a thread has taken it.
+    started_queue = None
+    if mode == "process" and max_workers > 1:
+        if file_timeout:
+            started_queue = multiprocessing.Queue()
+        executor = ProcessPoolExecutor(max_workers=max_workers, initializer=_init_process_worker,
+                                       initargs=(started_queue,))
+    else:
+        executor = ThreadPoolExecutor(max_workers=max_workers)
+    max_in_flight = max_workers * IN_FLIGHT_PER_WORKER
+
+    in_flight = {}
+    started = {}
+    batch_futures = {}
+    batch_ids = itertools.count()
+    state = {"stopped": False, "deadline": False, "abandoned": False}
+
+    def stop_requested():
+        if state["stopped"]:
+            return True
+        if deadline_at is not None and time.monotonic() >= deadline_at:
+            state["deadline"] = True
+            state["stopped"] = True
+        elif should_stop and should_stop():
+            state["stopped"] = True
+        return state["stopped"]
+
+    def error_results(batch, message):
+        return [(os.path.basename(path), "Error", "Error", "Error", message) for path, _ in batch]
+
+    def collect(futures):
+        for future in futures:
+            batch = in_flight.pop(future)
+            started.pop(future, None)
+            try:
+                results = future.result()
+            except Exception as e:
+                results = error_results(batch, str(e))
+            for (path, key), result in zip(batch, results):
+                if cache and key and "Error" not in result[1]:
+                    cache.put(path, *key, result)
+                yield path, result
+
+    def expire():
+        now = time.monotonic()
+        while started_queue is not None:
+            try:
+                batch_id, start = started_queue.get_nowait()
+            except queue.Empty:
+                break
+            future = batch_futures.pop(batch_id, None)
+            if future in in_flight:
+                started[future] = start
+        for future in list(in_flight):
+            if future.done():
+                continue
+            if started_queue is not None:
+                start = started.get(future)
+                if start is None:
+                    continue
+            elif future.running():
+                start = started.setdefault(future, now)
+            else:
+                continue
+            batch = in_flight[future]
+            if now - start > file_timeout * len(batch):
+                del in_flight[future]
+                del started[future]
+                state["abandoned"] = True
+                for path, _ in batch:
+                    yield path, error_results([(path, None)], "Превышено время обработки")[0]
+
+    def drain(block):
+        done, _ = wait(in_flight, timeout=WAIT_INTERVAL if block else 0, return_when=FIRST_COMPLETED)
+        # a slow file can hold the generator for a long time without yielding;
+        # on_idle lets the caller flush what it already has meanwhile
+        if block and not done and on_idle:
+            on_idle()
+        yield from collect(done)
+        if file_timeout:
+            yield from expire()
+
+    def submit(batch):
+        batch_id = next(batch_ids) if started_queue is not None else None
+        future = executor.submit(get_image_info_batch, [path for path, _ in batch], allow_full_decode, batch_id)
+        in_flight[future] = batch
+        if batch_id is not None:
+            batch_futures[batch_id] = future
+
+    found = 0
+    finished = False
+    files = iter_image_files(folder, formats, recursive=recursive, walkers=walkers,
+                             follow_symlinks=follow_symlinks, should_stop=stop_requested, on_idle=on_idle)
+    try:
+        batch = []
+        for path in files:
+            if stop_requested():
+                break
+
+            found += 1
+            if on_found and found % FOUND_REPORT_EVERY == 0:
+                on_found(found)
+
+            # the stat behind file_key is only paid for when there is a cache to look up
+            key = None
+            if cache:
+                try:
+                    key = file_key(path)
+                except OSError:
+                    pass
+                cached = cache.get(path, *key) if key else None
+                if cached is not None:
+                    yield path, cached
+                    continue
+
+            batch.append((path, key))
+            if len(batch) >= batch_size:
+                submit(batch)
+                batch = []
+
+            while len(in_flight) >= max_in_flight and not stop_requested():
+                yield from drain(block=True)
+            if in_flight:
+                yield from drain(block=False)
+
+        if on_found:
+            on_found(found)
+        if batch and not stop_requested():
+            submit(batch)
+
+        while in_flight and not stop_requested():
+            yield from drain(block=True)
+        finished = not state["stopped"]
+    finally:
+        files.close()
+        executor.shutdown(wait=finished and not state["abandoned"], cancel_futures=True)
+        if started_queue is not None:
+            started_queue.close()
+        if cache:
+            if not finished or not recursive or tuple(formats) != SUPPORTED_FORMATS:
+                cache.flush()
+            else:
+                cache.finish_scan(folder)
+
+    if state["deadline"]:
+        raise ScanDeadlineExceeded(f"Превышено время сканирования ({deadline} сек), обработано {found} файлов")
+
+
+def get_image_info_batch(paths, allow_full_decode=True, batch_id=None):
+    if batch_id is not None and _started_queue is not None:
+        _started_queue.put((batch_id, time.monotonic()))
+    return [get_image_info(path, allow_full_decode) for path in paths]
+
+
+def get_image_info(path, allow_full_decode=True):
+    try:
+        name = os.path.basename(path)
+        file_ext = os.path.splitext(path)[1].lower()
+
+        header_info = get_image_info_header(path, file_ext)
+        if header_info is not None:
+            return header_info
+
+        try:
+            with Image.open(path) as img:
+                width, height = img.size
+                size = f"{width}x{height}"
+
+                dpi = img.info.get('dpi')
+                if dpi and dpi != (0, 0):
+                    resolution = f"{dpi[0]}x{dpi[1]} DPI"
+                else:
+                    resolution = get_default_dpi(file_ext)
+
+                mode = img.mode
+                depth_info = get_depth_from_pil_mode(mode, file_ext)
+
+        except Exception as e:
+            if not allow_full_decode:
+                return (name, "Error", "Error", "Error", "Не удалось прочитать заголовок")
+            return get_image_info_opencv(path)
+
+        compression_info = get_compression_info_fast(path, file_ext)
+
+        return (name, size, resolution, depth_info, compression_info)
+
+    except Exception as e:
+        return (os.path.basename(path), "Error", "Error", "Error", str(e))
+
+
+def get_image_info_header(path, file_ext):
+    info = probe_header(path)
+    if info is None or not info.width or not info.height:
+        return None
+
+    size = f"{info.width}x{info.height}"
+    if info.dpi:
+        resolution = f"{round(info.dpi[0])}x{round(info.dpi[1])} DPI"
+    else:
+        resolution = get_default_dpi(file_ext)
+
+    if info.color_type:
+        depth_info = f"{info.bits} bit, {info.color_type}"
+    else:
+        depth_info = f"{info.bits} bit"
+
+    try:
+        file_size_kb = os.path.getsize(path) // 1024
+        compression_info = f"{info.compression}, {file_size_kb}KB"
+    except OSError:
+        compression_info = info.compression
+
+    return (os.path.basename(path), size, resolution, depth_info, compression_info)
+
+
+def get_image_info_opencv(path):
+    # OpenCV and NumPy are only needed for the full-decode fallback
+    import cv2
+    import numpy as np
+
+    try:
+        img = cv2.imread(path)
+        if img is None:
+            with open(path, 'rb') as f:
+                img_array = np.frombuffer(f.read(), dtype=np.uint8)
+                img = cv2.imdecode(img_array, cv2.IMREAD_COLOR)
+
+        if img is None:
+            return (os.path.basename(path), "Error", "Error", "Error", "Не удалось открыть")
+
+        name = os.path.basename(path)
+        height, width = img.shape[:2]
+        size = f"{width}x{height}"
+
+        file_ext = os.path.splitext(path)[1].lower()
+        resolution = get_dpi_from_image(path)
+        depth_info = get_depth_info(img, path)
+        compression_info = get_compression_info_fast(path, file_ext)
+
+        return (name, size, resolution, depth_info, compression_info)
+
+    except Exception as e:
+        return (os.path.basename(path), "Error", "Error", "Error", str(e))
+
+
+def get_depth_from_pil_mode(mode, file_ext):
+    mode_depth = {
+        '1': '1 bit',
+        'L': '8 bit',
+        'P': '8 bit',
+        'RGB': '24 bit',
+        'RGBA': '32 bit',
+        'CMYK': '32 bit',
+        'YCbCr': '24 bit',
+        'I': '32 bit',
+        'F': '32 bit'
+    }
+
+    depth = mode_depth.get(mode, f"Unknown mode: {mode}")
+
+    if file_ext == '.gif' and mode == 'P':
+        return "8 bit, Indexed (256 colors)"
+
+    return depth
+
+
+def get_default_dpi(file_ext):
+    dpi_map = {
+        '.bmp': '96x96 DPI',
+        '.jpg': '72x72 DPI',
+        '.jpeg': '72x72 DPI',
+        '.png': '96x96 DPI',
+        '.tif': '300x300 DPI',
+        '.tiff': '300x300 DPI',
+        '.gif': '72x72 DPI',
+        '.pcx': '96x96 DPI'
+    }
+    return dpi_map.get(file_ext, 'N/A')
+
+
+def get_compression_info_fast(path, file_ext):
+    try:
+        file_size = os.path.getsize(path)
+        file_size_kb = file_size // 1024
+
+        compression_map = {
+            '.bmp': 'BMP',
+            '.jpg': 'JPEG',
+            '.jpeg': 'JPEG',
+            '.png': 'PNG',
+            '.tif': 'TIFF',
+            '.tiff': 'TIFF',
+            '.gif': 'LZW',
+            '.pcx': 'RLE'
+        }
+
+        compression = compression_map.get(file_ext, 'Unknown')
+        return f"{compression}, {file_size_kb}KB"
+    except:
+        return "N/A"
+
+
+def get_depth_info(img, path):
+    import numpy as np
+
+    try:
+        dtype = img.dtype
+        if dtype == np.uint8:
+            bits_per_channel = 8
+        elif dtype == np.uint16:
+            bits_per_channel = 16
+        elif dtype == np.float32:
+            bits_per_channel = 32
+        elif dtype == np.float64:
+            bits_per_channel = 64
+        else:
+            bits_per_channel = "Unknown"
+
+        if len(img.shape) == 2:
+            channels = 1
+            color_type = "Grayscale"
+        elif len(img.shape) == 3:
+            channels = img.shape[2]
+            if channels == 3:
+                color_type = "BGR"
+            elif channels == 4:
+                color_type = "BGRA"
+            else:
+                color_type = f"{channels} channels"
+        else:
+            channels = "Unknown"
+            color_type = "Unknown"
+
+        if isinstance(bits_per_channel, int) and isinstance(channels, int):
+            total_bits = bits_per_channel * channels
+        else:
+            total_bits = "Unknown"
+
+        file_ext = os.path.splitext(path)[1].lower()
+        if file_ext in ['.gif']:
+            return "8 bit, Indexed (256 colors)"
+        elif file_ext in ['.bmp']:
+            bmp_depth = get_bmp_bit_depth(path)
+            if bmp_depth:
+                return f"{bmp_depth}, {color_type}"
+
+        if total_bits != "Unknown":
+            return f"{total_bits} bit, {color_type}"
+        else:
+            return f"{bits_per_channel} bit/channel, {color_type}"
+
+    except Exception as e:
+        return "Unknown"
+
+
+def get_bmp_bit_depth(path):
+    try:
+        with open(path, 'rb') as f:
+            header = f.read(30)
+            if header[0:2] != b'BM':
+                return None
+            bit_count = int.from_bytes(header[28:30], byteorder='little', signed=False)
+            bit_depth_map = {1: "1 bit", 4: "4 bit", 8: "8 bit", 16: "16 bit", 24: "24 bit", 32: "32 bit"}
+            return bit_depth_map.get(bit_count, f"{bit_count} bit")
+    except:
+        return None
+
+
+def get_dpi_from_image(path):
+    try:
+        if path.lower().endswith('.bmp'):
+            dpi = get_bmp_dpi(path)
+            if dpi:
+                return dpi
+            return "96x96 DPI"
+        elif path.lower().endswith(('.jpg', '.jpeg')):
+            return get_jpeg_dpi(path) or "72x72 DPI"
+        elif path.lower().endswith('.png'):
+            return "96x96 DPI"
+        elif path.lower().endswith(('.tiff', '.tif')):
+            return "300x300 DPI"
+        elif path.lower().endswith('.gif'):
+            return "72x72 DPI"
+        elif path.lower().endswith('.pcx'):
+            return "96x96 DPI"
+    except:
+        pass
+    return "N/A"
+
+
+def get_bmp_dpi(path):
+    try:
+        with open(path, 'rb') as f:
+            header = f.read(70)
+            if header[0:2] != b'BM':
+                return None
+            ppm_x = int.from_bytes(header[38:42], byteorder='little', signed=False)
+            ppm_y = int.from_bytes(header[42:46], byteorder='little', signed=False)
+            if ppm_x > 0 and ppm_y > 0:
+                dpi_x = round(ppm_x / 39.3701)
+                dpi_y = round(ppm_y / 39.3701)
+                return f"{dpi_x}x{dpi_y} DPI"
+    except:
+        pass
+    return None
+
+
+def get_jpeg_dpi(path):
+    try:
+        with open(path, 'rb') as f:
+            dpi = read_jpeg_dpi(f)
+            if dpi:
+                return f"{round(dpi[0])}x{round(dpi[1])} DPI"
+    except:
+        pass
+    return None
+
+
+def parse_formats(value):
+    formats = []
+    for item in value.split(","):
+        item = item.strip().lower()
+        if item:
+            formats.append(item if item.startswith(".") else "." + item)
+    return tuple(formats)
+
+
+def write_results(results, out, output_format):
+    count = 0
+    if output_format == "csv":
+        writer = csv.writer(out)
+        writer.writerow(("path",) + COLUMNS)
+        for path, result in results:
+            writer.writerow((path,) + tuple(result))
+            count += 1
+    else:
+        for path, result in results:
+            record = {"path": path}
+            record.update(zip(COLUMNS, result))
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            count += 1
+    return count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Информация об изображениях в папке (без GUI)")
+    parser.add_argument("folder", help="папка для сканирования")
+    parser.add_argument("-o", "--output", help="файл результата (по умолчанию stdout)")
+    parser.add_argument("--format", choices=("csv", "jsonl"), default="csv", help="формат вывода")
+    parser.add_argument("-w", "--workers", type=int, default=DEFAULT_WORKERS,
+                        help="число потоков или процессов (по умолчанию число ядер)")
+    parser.add_argument("--mode", choices=EXECUTOR_MODES, default="thread",
+                        help="thread - для медленных дисков, process - для декодирования на CPU")
+    parser.add_argument("--batch-size", type=int, default=None,
+                        help="файлов на одну задачу (по умолчанию 1 для потоков, 64 для процессов)")
+    parser.add_argument("--no-recursive", action="store_true", help="не заходить во вложенные папки")
+    parser.add_argument("--walkers", type=int, default=DEFAULT_WALKERS, help="потоков обхода каталогов")
+    parser.add_argument("--follow-symlinks", action="store_true",
+                        help="заходить в символические ссылки на каталоги (циклы пропускаются)")
+    parser.add_argument("--formats", type=parse_formats, default=SUPPORTED_FORMATS,
+                        help="расширения через запятую, например jpg,png,tif")
+    parser.add_argument("--timeout", type=float, default=None,
+                        help="максимальное время обработки одного файла, сек")
+    parser.add_argument("--deadline", type=float, default=None,
+                        help="максимальное время всего сканирования, сек")
+    parser.add_argument("--no-cache", action="store_true", help="не использовать кэш результатов")
+    parser.add_argument("--cache-path", default=DEFAULT_CACHE_PATH, help="путь к файлу кэша")
+    parser.add_argument("--no-full-decode", action="store_true",
+                        help="не декодировать изображение, если заголовок не прочитан")
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.folder):
+        parser.error(f"папка не найдена: {args.folder}")
+
+    cache = None if args.no_cache else ScanCache(args.cache_path)
+    out = open(args.output, "w", newline="", encoding="utf-8") if args.output else sys.stdout
+    try:
+        results = scan_folder(args.folder, max_workers=args.workers, recursive=not args.no_recursive,
+                              formats=args.formats, cache=cache,
+                              allow_full_decode=not args.no_full_decode,
+                              mode=args.mode, batch_size=args.batch_size,
+                              walkers=args.walkers, follow_symlinks=args.follow_symlinks,
+                              file_timeout=args.timeout, deadline=args.deadline)
+        count = write_results(results, out, args.format)
+    except ScanDeadlineExceeded as e:
+        print(e, file=sys.stderr)
+        return 2
+    finally:
+        if args.output:
+            out.close()
+        if cache:
+            cache.close()
+
+    print(f"Обработано {count} файлов", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,240 @@
+import re
+import time
+from tkinter import *
+from tkinter import ttk
+
+REFRESH_INTERVAL_MS = 100
+RESORT_INTERVAL = 0.5
+DEFAULT_ROW_HEIGHT = 20
+
+_number_re = re.compile(r"\d+(?:\.\d+)?")
+
+
+def _numbers(value):
+    return [float(n) for n in _number_re.findall(value)]
+
+
+def size_key(value):
+    numbers = _numbers(value)
+    if len(numbers) >= 2:
+        return (numbers[0] * numbers[1], numbers[0])
+    return (-1, -1)
+
+
+def first_number_key(value):
+    numbers = _numbers(value)
+    return numbers[0] if numbers else -1
+
+
+def format_key(value):
+    numbers = _numbers(value)
+    return (value.split(",")[0], numbers[-1] if numbers else -1)
+
+
+def text_key(value):
+    return value.lower()
+
+
+class VirtualTable(Frame):
+    def __init__(self, master, columns, headings, widths=None, sort_keys=None, unique_columns=(), **kwargs):
+        super().__init__(master, **kwargs)
+        self.columns = tuple(columns)
+        self.headings = dict(headings)
+        self.sort_keys = dict(sort_keys or {})
+        self.unique_columns = set(unique_columns)
+
+        self.data = [[] for _ in self.columns]
+        self._pools = self._new_pools()
+        self._key_cache = {}
+        self.view = None
+        self.offset = 0
+        self.visible_rows = 1
+        self.sort_column = None
+        self.sort_reverse = False
+        self.filter_column = None
+        self.filter_text = ""
+        self._needs_sort = False
+        self._last_sort = 0.0
+        self._refresh_pending = False
+
+        filter_frame = Frame(self)
+        filter_frame.pack(side=TOP, fill=X, pady=(0, 5))
+        Label(filter_frame, text="Фильтр:").pack(side=LEFT)
+        self.filter_column_var = StringVar(value=self.headings[self.columns[0]])
+        ttk.Combobox(filter_frame, textvariable=self.filter_column_var, state="readonly", width=18,
+                     values=[self.headings[c] for c in self.columns]).pack(side=LEFT, padx=5)
+        self.filter_var = StringVar()
+        filter_entry = Entry(filter_frame, textvariable=self.filter_var, width=30)
+        filter_entry.pack(side=LEFT, padx=5)
+        filter_entry.bind("<Return>", lambda e: self.apply_filter())
+        Button(filter_frame, text="Применить", command=self.apply_filter).pack(side=LEFT, padx=5)
+        self.count_label = Label(filter_frame, text="")
+        self.count_label.pack(side=RIGHT)
+
+        self.tree = ttk.Treeview(self, columns=self.columns, show="headings", height=20, selectmode="browse")
+        for column in self.columns:
+            self.tree.heading(column, text=self.headings[column], command=lambda c=column: self.sort_by(c))
+            if widths and column in widths:
+                self.tree.column(column, width=widths[column])
+
+        self.scrollbar = ttk.Scrollbar(self, orient=VERTICAL, command=self.on_scroll)
+        self.scrollbar.pack(side=RIGHT, fill=Y)
+        self.tree.pack(side=LEFT, fill=BOTH, expand=1)
+
+        self.tree.bind("<Configure>", self.on_resize)
+        self.tree.bind("<MouseWheel>", self.on_mousewheel)
+        self.tree.bind("<Button-4>", lambda e: self.scroll_by(-3))
+        self.tree.bind("<Button-5>", lambda e: self.scroll_by(3))
+        self.tree.bind("<Prior>", lambda e: self.scroll_by(-self.visible_rows))
+        self.tree.bind("<Next>", lambda e: self.scroll_by(self.visible_rows))
+
+        self.row_height = int(ttk.Style(self).lookup("Treeview", "rowheight") or DEFAULT_ROW_HEIGHT)
+        self._items = []
+
+    def _new_pools(self):
+        return [None if c in self.unique_columns else {} for c in self.columns]
+
+    def __len__(self):
+        return len(self.data[0])
+
+    def row(self, index):
+        return tuple(column[index] for column in self.data)
+
+    def append_rows(self, rows):
+        start = len(self)
+        width = len(self.columns)
+        for row in rows:
+            row = tuple(row)[:width] + ("",) * (width - len(row))
+            for column, pool, value in zip(self.data, self._pools, row):
+                value = str(value)
+                column.append(value if pool is None else pool.setdefault(value, value))
+
+        for column, keys in self._key_cache.items():
+            key_func = self.sort_keys.get(column, text_key)
+            keys.extend(key_func(value) for value in self.data[self.columns.index(column)][start:])
+
+        if self.view is not None:
+            self.view.extend(self._filtered(range(start, len(self))))
+            self._needs_sort = self.sort_column is not None
+        self.schedule_refresh()
+
+    def clear(self):
+        self.data = [[] for _ in self.columns]
+        self._pools = self._new_pools()
+        self._key_cache = {}
+        self.view = [] if self.sort_column or self.filter_text else None
+        self.offset = 0
+        self._needs_sort = False
+        self.refresh()
+
+    def sort_by(self, column):
+        if self.sort_column == column:
+            self.sort_reverse = not self.sort_reverse
+        else:
+            self.sort_column = column
+            self.sort_reverse = False
+        for c in self.columns:
+            arrow = ""
+            if c == column:
+                arrow = " ▼" if self.sort_reverse else " ▲"
+            self.tree.heading(c, text=self.headings[c] + arrow)
+        self.rebuild_view()
+
+    def apply_filter(self):
+        heading = self.filter_column_var.get()
+        self.filter_column = next((c for c in self.columns if self.headings[c] == heading), self.columns[0])
+        self.filter_text = self.filter_var.get().strip().lower()
+        self.rebuild_view()
+
+    def rebuild_view(self):
+        if self.sort_column is None and not self.filter_text:
+            self.view = None
+        else:
+            self.view = self._filtered(range(len(self)))
+            self._sort_view()
+        self.offset = 0
+        self.refresh()
+
+    def _filtered(self, indices):
+        if not self.filter_text:
+            return list(indices)
+        column = self.data[self.columns.index(self.filter_column)]
+        text = self.filter_text
+        return [i for i in indices if text in column[i].lower()]
+
+    def _sort_view(self):
+        if self.sort_column is None or self.view is None:
+            return
+        keys = self._key_cache.get(self.sort_column)
+        if keys is None:
+            key_func = self.sort_keys.get(self.sort_column, text_key)
+            keys = [key_func(value) for value in self.data[self.columns.index(self.sort_column)]]
+            self._key_cache[self.sort_column] = keys
+        self.view.sort(key=keys.__getitem__, reverse=self.sort_reverse)
+        self._needs_sort = False
+        self._last_sort = time.perf_counter()
+
+    def view_length(self):
+        return len(self) if self.view is None else len(self.view)
+
+    def schedule_refresh(self):
+        if not self._refresh_pending:
+            self._refresh_pending = True
+            self.after(REFRESH_INTERVAL_MS, self.refresh)
+
+    def refresh(self):
+        self._refresh_pending = False
+        if self._needs_sort:
+            if time.perf_counter() - self._last_sort >= RESORT_INTERVAL:
+                self._sort_view()
+            else:
+                self.schedule_refresh()
+
+        total = self.view_length()
+        self.offset = max(0, min(self.offset, total - self.visible_rows))
+
+        while len(self._items) < self.visible_rows:
+            self._items.append(self.tree.insert("", END, values=()))
+        while len(self._items) > self.visible_rows:
+            self.tree.delete(self._items.pop())
+
+        for slot, item in enumerate(self._items):
+            position = self.offset + slot
+            if position < total:
+                index = position if self.view is None else self.view[position]
+                self.tree.item(item, values=self.row(index))
+            else:
+                self.tree.item(item, values=())
+
+        if total > 0:
+            first = self.offset / total
+            last = min(1.0, (self.offset + self.visible_rows) / total)
+        else:
+            first, last = 0.0, 1.0
+        self.scrollbar.set(first, last)
+        if self.view_length() != len(self):
+            self.count_label.config(text=f"Показано: {total} из {len(self)}")
+        else:
+            self.count_label.config(text=f"Строк: {total}")
+
+    def on_resize(self, event):
+        rows = max(1, (event.height - self.row_height) // self.row_height)
+        if rows != self.visible_rows:
+            self.visible_rows = rows
+            self.refresh()
+
+    def on_scroll(self, action, value, unit=None):
+        if action == "moveto":
+            self.offset = int(float(value) * self.view_length())
+            self.refresh()
+        elif action == "scroll":
+            step = self.visible_rows if unit == "pages" else 1
+            self.scroll_by(int(value) * step)
+
+    def scroll_by(self, rows):
+        self.offset += rows
+        self.refresh()
+        return "break"
+
+    def on_mousewheel(self, event):
+        return self.scroll_by(-3 if event.delta > 0 else 3)
@@ -0,0 +1,103 @@
+import os
+import queue
+import threading
+
+DEFAULT_WALKERS = 8
+FILE_QUEUE_SIZE = 256
+PUT_TIMEOUT = 0.1
+
+_DONE = object()
+
+
+def iter_image_files(folder, formats, recursive=True, walkers=DEFAULT_WALKERS,
+                     follow_symlinks=False, queue_size=FILE_QUEUE_SIZE, should_stop=None, on_idle=None):
+    formats = tuple(f.lower() for f in formats)
+    if not recursive:
+        with os.scandir(folder) as entries:
+            for entry in entries:
+                if entry.name.lower().endswith(formats) and entry.is_file():
+                    yield entry.path
+        return
+
+    files = queue.Queue(maxsize=queue_size)
+    dirs = queue.Queue()
+    stop = threading.Event()
+    visited = set()
+    visited_lock = threading.Lock()
+
+    def enter(path, entry=None):
+        try:
+            st = entry.stat() if entry is not None else os.stat(path)
+        except OSError:
+            return False
+        key = (st.st_dev, st.st_ino)
+        with visited_lock:
+            if key in visited:
+                return False
+            visited.add(key)
+        return True
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                files.put(item, timeout=PUT_TIMEOUT)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def walk():
+        while True:
+            path = dirs.get()
+            if path is None:
+                dirs.task_done()
+                return
+            try:
+                if stop.is_set():
+                    continue
+                found = []
+                with os.scandir(path) as entries:
+                    for entry in entries:
+                        if entry.name.lower().endswith(formats) and entry.is_file():
+                            found.append(entry.path)
+                        elif entry.is_dir(follow_symlinks=follow_symlinks):
+                            if follow_symlinks and not enter(entry.path, entry):
+                                continue
+                            dirs.put(entry.path)
+                if found:
+                    put(found)
+            except OSError:
+                pass
+            finally:
+                dirs.task_done()
+
+    def coordinate():
+        dirs.join()
+        for _ in threads:
+            dirs.put(None)
+        put(_DONE)
+
+    enter(folder)
+    dirs.put(folder)
+    threads = [threading.Thread(target=walk, daemon=True) for _ in range(max(1, walkers))]
+    for thread in threads:
+        thread.start()
+    threading.Thread(target=coordinate, daemon=True).start()
+
+    try:
+        while True:
+            # a long walk can go without finding anything, so the queue is polled
+            # and a stop request ends the walk without waiting for the next file
+            try:
+                item = files.get(timeout=PUT_TIMEOUT)
+            except queue.Empty:
+                if should_stop and should_stop():
+                    return
+                if on_idle:
+                    on_idle()
+                continue
+            if item is _DONE:
+                return
+            yield from item
+    finally:
+        stop.set()
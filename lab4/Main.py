@@ -3,6 +3,8 @@ from tkinter import ttk, messagebox
 import time
 import math
 
+from canvas_layers import RasterLayer, grid_layer
+
 GRID_SIZE = 55       
 DEFAULT_SCALE = 13    
 MIN_SCALE = 10
@@ -17,74 +19,197 @@ LINE_COLOR = "#ff6b35"
 RASTER_COLOR = "#000000" 
 TEXT_FONT = ("Consolas", 9)
 COORD_COLOR = "#2e86ab"  
+BACKGROUND_COLOR = "#ffffff"
+GRID_CACHE_SIZE = 4
 
-def naive_line(x0, y0, x1, y1):
-    points = []
-    log = []
-    
+TRACE_OFF = "off"
+TRACE_SUMMARY = "summary"
+TRACE_FULL = "full"
+TRACE_LEVELS = [
+    ("Без журнала", TRACE_OFF),
+    ("Кратко", TRACE_SUMMARY),
+    ("Подробно", TRACE_FULL)
+]
+
+# DDA and Wu either step in floats or in integers; Wu intensities use 16.16 fixed point.
+# The integer versions follow exact arithmetic, the float ones do not always: float DDA
+# breaks an exact tie by summation error instead of to even, and float Wu that lands just
+# below a whole intery moves the zero-intensity pixel of the pair to the other side.
+# check_fixed.py pins both.
+MODE_FLOAT = "float"
+MODE_FIXED = "fixed"
+FIXED_SHIFT = 16
+FIXED_ONE = 1 << FIXED_SHIFT
+FIXED_HALF = FIXED_ONE >> 1
+
+def _trace_log(trace, log_func, *args):
+    # the log is a generator: nothing is formatted until somebody reads it
+    if trace == TRACE_OFF:
+        return iter(())
+    return log_func(*args, full=trace == TRACE_FULL)
+
+def naive_line(x0, y0, x1, y1, trace=TRACE_FULL):
     if x0 == x1:
         step = 1 if y1 > y0 else -1
-        for y in range(y0, y1 + step, step):
-            points.append((x0, y))
-            log.append(f"x={x0}, y={y} (вертикальная)")
+        points = [(x0, y) for y in range(y0, y1 + step, step)]
     else:
         k = (y1 - y0) / (x1 - x0)
         b = y0 - k * x0
-        log.append(f"Уравнение: y = {k:.3f}x + {b:.3f}")
         
         if abs(k) <= 1:
             step = 1 if x1 > x0 else -1
-            for x in range(x0, x1 + step, step):
-                y = k * x + b
-                y_round = round(y)
-                points.append((x, y_round))
-                log.append(f"x={x}, y={y:.3f} -> {y_round}")
+            points = [(x, round(k * x + b)) for x in range(x0, x1 + step, step)]
         else:
             step = 1 if y1 > y0 else -1
-            for y in range(y0, y1 + step, step):
-                x = (y - b) / k
-                x_round = round(x)
-                points.append((x_round, y))
-                log.append(f"y={y}, x={x:.3f} -> {x_round}")
+            points = [(round((y - b) / k), y) for y in range(y0, y1 + step, step)]
     
-    return points, log
+    return points, _trace_log(trace, naive_line_log, x0, y0, x1, y1)
 
-def dda_line(x0, y0, x1, y1):
-    points = []
-    log = []
+def naive_line_log(x0, y0, x1, y1, full=True):
+    if x0 == x1:
+        if full:
+            step = 1 if y1 > y0 else -1
+            for y in range(y0, y1 + step, step):
+                yield f"x={x0}, y={y} (вертикальная)"
+        return
+    
+    k = (y1 - y0) / (x1 - x0)
+    b = y0 - k * x0
+    yield f"Уравнение: y = {k:.3f}x + {b:.3f}"
+    if not full:
+        return
+    
+    if abs(k) <= 1:
+        step = 1 if x1 > x0 else -1
+        for x in range(x0, x1 + step, step):
+            y = k * x + b
+            yield f"x={x}, y={y:.3f} -> {round(y)}"
+    else:
+        step = 1 if y1 > y0 else -1
+        for y in range(y0, y1 + step, step):
+            x = (y - b) / k
+            yield f"y={y}, x={x:.3f} -> {round(x)}"
+
+def dda_line(x0, y0, x1, y1, trace=TRACE_FULL, mode=MODE_FLOAT):
+    if mode == MODE_FIXED:
+        return dda_line_fixed(x0, y0, x1, y1, trace)
     
     dx = x1 - x0
     dy = y1 - y0
     steps = max(abs(dx), abs(dy))
     
     if steps == 0:
-        points.append((x0, y0))
-        log.append("Точка (нулевая длина)")
-        return points, log
+        return [(x0, y0)], _trace_log(trace, dda_line_log, x0, y0, x1, y1)
     
     x_inc = dx / steps
     y_inc = dy / steps
     
     x = x0
     y = y0
-    
-    log.append(f"dx={dx}, dy={dy}, steps={steps}")
-    log.append(f"x_inc={x_inc:.3f}, y_inc={y_inc:.3f}")
+    points = []
     
     for i in range(steps + 1):
-        x_round = round(x)
-        y_round = round(y)
-        points.append((x_round, y_round))
-        log.append(f"шаг {i}: x={x:.3f}, y={y:.3f} -> ({x_round},{y_round})")
+        points.append((round(x), round(y)))
         x += x_inc
         y += y_inc
     
-    return points, log
+    return points, _trace_log(trace, dda_line_log, x0, y0, x1, y1)
 
-def bresenham_line(x0, y0, x1, y1):
+def dda_line_log(x0, y0, x1, y1, full=True):
+    dx = x1 - x0
+    dy = y1 - y0
+    steps = max(abs(dx), abs(dy))
+    
+    if steps == 0:
+        yield "Точка (нулевая длина)"
+        return
+    
+    x_inc = dx / steps
+    y_inc = dy / steps
+    
+    yield f"dx={dx}, dy={dy}, steps={steps}"
+    yield f"x_inc={x_inc:.3f}, y_inc={y_inc:.3f}"
+    if not full:
+        return
+    
+    x = x0
+    y = y0
+    for i in range(steps + 1):
+        yield f"шаг {i}: x={x:.3f}, y={y:.3f} -> ({round(x)},{round(y)})"
+        x += x_inc
+        y += y_inc
+
+def _dda_error_terms(major, minor):
+    # The minor coordinate moves |minor| / steps per step. Its integer part and a doubled
+    # error term err = 2 * (|minor| * i - offset * steps), kept in (-steps, steps], make
+    # the rounding exact; err == steps is a tie, which round() sends to the even pixel.
+    steps = abs(major)
+    step = 1 if minor > 0 else -1
+    error_inc = 2 * abs(minor)
+    error_wrap = 2 * steps
+    return steps, step, error_inc, error_wrap
+
+def dda_line_fixed(x0, y0, x1, y1, trace=TRACE_FULL):
+    x0, y0, x1, y1 = int(x0), int(y0), int(x1), int(y1)
+    dx = x1 - x0
+    dy = y1 - y0
+    
+    if dx == 0 and dy == 0:
+        return [(x0, y0)], _trace_log(trace, dda_line_fixed_log, x0, y0, x1, y1)
+    
+    x_major = abs(dx) >= abs(dy)
+    if x_major:
+        a, c, major, minor = x0, y0, dx, dy
+    else:
+        a, c, major, minor = y0, x0, dy, dx
+    steps, step, error_inc, error_wrap = _dda_error_terms(major, minor)
+    a_step = 1 if major > 0 else -1
+    err = 0
     points = []
-    log = []
     
+    for i in range(steps + 1):
+        pixel = c + step if err == steps and c & 1 else c
+        points.append((a, pixel) if x_major else (pixel, a))
+        a += a_step
+        err += error_inc
+        if err > steps:
+            err -= error_wrap
+            c += step
+    
+    return points, _trace_log(trace, dda_line_fixed_log, x0, y0, x1, y1)
+
+def dda_line_fixed_log(x0, y0, x1, y1, full=True):
+    dx = x1 - x0
+    dy = y1 - y0
+    
+    if dx == 0 and dy == 0:
+        yield "Точка (нулевая длина)"
+        return
+    
+    x_major = abs(dx) >= abs(dy)
+    major, minor = (dx, dy) if x_major else (dy, dx)
+    steps, step, error_inc, error_wrap = _dda_error_terms(major, minor)
+    
+    yield f"dx={dx}, dy={dy}, steps={steps}, ведущая ось: {'X' if x_major else 'Y'}"
+    yield f"Целочисленная ошибка: приращение {error_inc}, перенос {error_wrap}"
+    if not full:
+        return
+    
+    a, c = (x0, y0) if x_major else (y0, x0)
+    a_step = 1 if major > 0 else -1
+    err = 0
+    for i in range(steps + 1):
+        pixel = c + step if err == steps and c & 1 else c
+        point = (a, pixel) if x_major else (pixel, a)
+        tie = " (середина, к чётному)" if err == steps else ""
+        yield f"шаг {i}: ошибка={err} -> {point}{tie}"
+        a += a_step
+        err += error_inc
+        if err > steps:
+            err -= error_wrap
+            c += step
+
+def bresenham_line(x0, y0, x1, y1, trace=TRACE_FULL):
     x0, y0, x1, y1 = int(x0), int(y0), int(x1), int(y1)
     dx = abs(x1 - x0)
     dy = abs(y1 - y0)
@@ -93,15 +218,45 @@ def bresenham_line(x0, y0, x1, y1):
     sy = 1 if y0 < y1 else -1
     err = dx - dy
     
-    log.append(f"dx={dx}, dy={dy}, sx={sx}, sy={sy}")
-    log.append(f"Начальная ошибка: {err}")
+    x, y = x0, y0
+    points = []
+    
+    while True:
+        points.append((x, y))
+        
+        if x == x1 and y == y1:
+            break
+            
+        e2 = 2 * err
+        
+        if e2 > -dy:
+            err -= dy
+            x += sx
+            
+        if e2 < dx:
+            err += dx
+            y += sy
+    
+    return points, _trace_log(trace, bresenham_line_log, x0, y0, x1, y1)
+
+def bresenham_line_log(x0, y0, x1, y1, full=True):
+    dx = abs(x1 - x0)
+    dy = abs(y1 - y0)
+    
+    sx = 1 if x0 < x1 else -1
+    sy = 1 if y0 < y1 else -1
+    err = dx - dy
+    
+    yield f"dx={dx}, dy={dy}, sx={sx}, sy={sy}"
+    yield f"Начальная ошибка: {err}"
+    if not full:
+        return
     
     x, y = x0, y0
     step = 0
     
     while True:
-        points.append((x, y))
-        log.append(f"шаг {step}: ({x},{y}), ошибка={err}")
+        yield f"шаг {step}: ({x},{y}), ошибка={err}"
         
         if x == x1 and y == y1:
             break
@@ -111,26 +266,58 @@ def bresenham_line(x0, y0, x1, y1):
         if e2 > -dy:
             err -= dy
             x += sx
-            log.append(f"  движение по X -> x={x}, ошибка={err}")
+            yield f"  движение по X -> x={x}, ошибка={err}"
             
         if e2 < dx:
             err += dx
             y += sy
-            log.append(f"  движение по Y -> y={y}, ошибка={err}")
+            yield f"  движение по Y -> y={y}, ошибка={err}"
             
         step += 1
-    
-    return points, log
 
-def bresenham_circle(xc, yc, r):
-    points = []
-    log = []
+def bresenham_circle(xc, yc, r, trace=TRACE_FULL):
+    # Each pixel is emitted once: the eight octant points only coincide on the axes
+    # (x == 0), on the diagonals (x == y) and for r == 0, so those steps emit fewer.
+    x = 0
+    y = int(abs(r))
+    d = 3 - 2 * y
+    
+    if y == 0:
+        return [(xc, yc)], _trace_log(trace, bresenham_circle_log, xc, yc, r)
     
+    points = [(xc, yc + y), (xc, yc - y), (xc + y, yc), (xc - y, yc)]
+    
+    while True:
+        if d < 0:
+            d = d + 4 * x + 6
+        else:
+            d = d + 4 * (x - y) + 10
+            y -= 1
+            
+        x += 1
+        if x > y:
+            break
+        
+        if x == y:
+            points += ((xc + x, yc + y), (xc - x, yc + y), (xc + x, yc - y), (xc - x, yc - y))
+        else:
+            points += (
+                (xc + x, yc + y), (xc - x, yc + y),
+                (xc + x, yc - y), (xc - x, yc - y),
+                (xc + y, yc + x), (xc - y, yc + x),
+                (xc + y, yc - x), (xc - y, yc - x)
+            )
+    
+    return points, _trace_log(trace, bresenham_circle_log, xc, yc, r)
+
+def bresenham_circle_log(xc, yc, r, full=True):
     x = 0
     y = int(abs(r))
     d = 3 - 2 * y
     
-    log.append(f"Начальные: x={x}, y={y}, d={d}")
+    yield f"Начальные: x={x}, y={y}, d={d}"
+    if not full:
+        return
     
     step = 0
     
@@ -142,102 +329,182 @@ def bresenham_circle(xc, yc, r):
             (xc + y, yc - x), (xc - y, yc - x)
         ]
         
-        for point in octants:
-            points.append(point)
-            
-        log.append(f"шаг {step}: x={x}, y={y}, d={d}")
-        log.append(f"  точки: {octants}")
+        yield f"шаг {step}: x={x}, y={y}, d={d}"
+        yield f"  точки: {octants}"
         
         if d < 0:
             d = d + 4 * x + 6
-            log.append(f"  d < 0: новое d = {d}")
+            yield f"  d < 0: новое d = {d}"
         else:
             d = d + 4 * (x - y) + 10
             y -= 1
-            log.append(f"  d >= 0: новое d = {d}, y уменьшен до {y}")
+            yield f"  d >= 0: новое d = {d}, y уменьшен до {y}"
             
         x += 1
         step += 1
-    
-    seen = set()
-    unique_points = []
-    for point in points:
-        if point not in seen:
-            unique_points.append(point)
-            seen.add(point)
-    
-    return unique_points, log
 
-def wu_line(x0, y0, x1, y1):
-    points = []
-    log = []
-    
+def _wu_setup(x0, y0, x1, y1):
     x0, y0, x1, y1 = float(x0), float(y0), float(x1), float(y1)
     
     dx = x1 - x0
     dy = y1 - y0
     steep = abs(dy) > abs(dx)
     
-    log.append(f"dx={dx:.3f}, dy={dy:.3f}, steep={steep}")
-    
     if steep:
         x0, y0 = y0, x0
         x1, y1 = y1, x1
         dx, dy = dy, dx
-        log.append(f"Обмен координат: ({x0:.3f}, {y0:.3f}) -> ({x1:.3f}, {y1:.3f})")
     
-    if x0 > x1:
+    swapped = x0 > x1
+    if swapped:
         x0, x1 = x1, x0
         y0, y1 = y1, y0
         dx, dy = -dx, -dy
-        log.append(f"Обмен концов: ({x0:.3f}, {y0:.3f}) -> ({x1:.3f}, {y1:.3f})")
     
     gradient = dy / dx if dx != 0 else 0
-    log.append(f"Градиент: {gradient:.3f}")
+    return x0, y0, x1, y1, dx, dy, steep, swapped, gradient
+
+def wu_line(x0, y0, x1, y1, trace=TRACE_FULL, mode=MODE_FLOAT):
+    if mode == MODE_FIXED:
+        return wu_line_fixed(x0, y0, x1, y1, trace)
+    
+    args = (x0, y0, x1, y1)
+    x0, y0, x1, y1, dx, dy, steep, swapped, gradient = _wu_setup(x0, y0, x1, y1)
+    
+    if steep:
+        points = [(round(y0), round(x0), 255), (round(y1), round(x1), 255)]
+    else:
+        points = [(round(x0), round(y0), 255), (round(x1), round(y1), 255)]
     
-    def plot(x, y, intensity, is_steep):
-        if is_steep:
-            points.append((y, x, intensity))
+    intery = y0 + gradient * (round(x0) + 1 - x0)
+    x = round(x0) + 1
+    x_last = round(x1) - 1
+    
+    while x <= x_last:
+        y = math.floor(intery)
+        frac = intery - y
+        
+        if steep:
+            points.append((y, x, round((1 - frac) * 255)))
+            points.append((y + 1, x, round(frac * 255)))
         else:
-            points.append((x, y, intensity))
+            points.append((x, y, round((1 - frac) * 255)))
+            points.append((x, y + 1, round(frac * 255)))
+        
+        intery += gradient
+        x += 1
     
-    x_start = round(x0)
-    y_start = round(y0)
-    plot(x_start, y_start, 255, steep)
-    log.append(f"Начальная точка: ({x_start}, {y_start}), интенсивность: 255")
+    return points, _trace_log(trace, wu_line_log, *args)
+
+def wu_line_log(x0, y0, x1, y1, full=True):
+    dx, dy = float(x1) - float(x0), float(y1) - float(y0)
+    x0, y0, x1, y1, _, _, steep, swapped, gradient = _wu_setup(x0, y0, x1, y1)
     
-    x_end = round(x1)
-    y_end = round(y1)
-    plot(x_end, y_end, 255, steep)
-    log.append(f"Конечная точка: ({x_end}, {y_end}), интенсивность: 255")
+    yield f"dx={dx:.3f}, dy={dy:.3f}, steep={steep}"
+    if steep:
+        # coordinates after the axis swap but before the end swap
+        sx0, sy0, sx1, sy1 = (x1, y1, x0, y0) if swapped else (x0, y0, x1, y1)
+        yield f"Обмен координат: ({sx0:.3f}, {sy0:.3f}) -> ({sx1:.3f}, {sy1:.3f})"
+    if swapped:
+        yield f"Обмен концов: ({x0:.3f}, {y0:.3f}) -> ({x1:.3f}, {y1:.3f})"
+    yield f"Градиент: {gradient:.3f}"
+    
+    yield f"Начальная точка: ({round(x0)}, {round(y0)}), интенсивность: 255"
+    yield f"Конечная точка: ({round(x1)}, {round(y1)}), интенсивность: 255"
     
     intery = y0 + gradient * (round(x0) + 1 - x0)
-    log.append(f"Начальное intery: {intery:.3f}")
+    yield f"Начальное intery: {intery:.3f}"
     
     x = round(x0) + 1
-    step_count = 0
+    inner = max(0, round(x1) - x)
+    if full:
+        step_count = 0
+        while x <= round(x1) - 1:
+            y = math.floor(intery)
+            frac = intery - y
+            
+            yield f"шаг {step_count}: x={x}, y_floor={y}, frac={frac:.3f}"
+            yield f"  верхняя точка: ({x}, {y}), интенсивность: {round((1 - frac) * 255)}"
+            yield f"  нижняя точка: ({x}, {y+1}), интенсивность: {round(frac * 255)}"
+            
+            intery += gradient
+            x += 1
+            step_count += 1
     
-    while x <= round(x1) - 1:
-        y_f = intery
-        y = math.floor(y_f)
-        frac = y_f - y
-        
-        intensity_upper = round((1 - frac) * 255)
-        intensity_lower = round(frac * 255)
-        
-        plot(x, y, intensity_upper, steep)
-        plot(x, y + 1, intensity_lower, steep)
+    yield f"Всего точек: {2 + 2 * inner}"
+
+def _wu_fixed_setup(x0, y0, x1, y1):
+    x0, y0, x1, y1 = int(x0), int(y0), int(x1), int(y1)
+    steep = abs(y1 - y0) > abs(x1 - x0)
+    
+    if steep:
+        x0, y0, x1, y1 = y0, x0, y1, x1
+    if x0 > x1:
+        x0, y0, x1, y1 = x1, y1, x0, y0
+    
+    dx = max(x1 - x0, 1)
+    # intery = y + rem / dx exactly; the 16.16 factor turns rem into an intensity
+    y_step, rem_step = divmod(y1 - y0, dx)
+    intensity_factor = (255 * FIXED_ONE * 2 + dx) // (2 * dx)
+    return x0, y0, x1, y1, steep, dx, y_step, rem_step, intensity_factor
+
+def wu_line_fixed(x0, y0, x1, y1, trace=TRACE_FULL):
+    # Integer endpoints make intery advance by the rational dy / dx, so its integer part
+    # and remainder are tracked exactly and floor() is gone. The intensity is
+    # rem * 255 / dx in 16.16, one multiply and a shift, within one level of round().
+    # On a whole intery the pair is (y, 255), (y + 1, 0), where float Wu may give
+    # (y - 1, 0), (y, 255): the same image, but not the same pixel positions.
+    args = (x0, y0, x1, y1)
+    x0, y0, x1, y1, steep, dx, y_step, rem_step, factor = _wu_fixed_setup(x0, y0, x1, y1)
+    
+    if steep:
+        points = [(y0, x0, 255), (y1, x1, 255)]
+    else:
+        points = [(x0, y0, 255), (x1, y1, 255)]
+    
+    y = y0 + y_step
+    rem = rem_step
+    for x in range(x0 + 1, x1):
+        lower = (rem * factor + FIXED_HALF) >> FIXED_SHIFT
         
-        log.append(f"шаг {step_count}: x={x}, y_floor={y}, frac={frac:.3f}")
-        log.append(f"  верхняя точка: ({x}, {y}), интенсивность: {intensity_upper}")
-        log.append(f"  нижняя точка: ({x}, {y+1}), интенсивность: {intensity_lower}")
+        if steep:
+            points.append((y, x, 255 - lower))
+            points.append((y + 1, x, lower))
+        else:
+            points.append((x, y, 255 - lower))
+            points.append((x, y + 1, lower))
         
-        intery += gradient
-        x += 1
-        step_count += 1
+        y += y_step
+        rem += rem_step
+        if rem >= dx:
+            rem -= dx
+            y += 1
+    
+    return points, _trace_log(trace, wu_line_fixed_log, *args)
+
+def wu_line_fixed_log(x0, y0, x1, y1, full=True):
+    x0, y0, x1, y1, steep, dx, y_step, rem_step, factor = _wu_fixed_setup(x0, y0, x1, y1)
+    
+    yield f"steep={steep}, концы после обмена: ({x0}, {y0}) -> ({x1}, {y1})"
+    yield f"Градиент: {y_step} + {rem_step}/{dx}, множитель яркости {factor} (16.16)"
+    
+    if full:
+        y = y0 + y_step
+        rem = rem_step
+        for step, x in enumerate(range(x0 + 1, x1)):
+            lower = (rem * factor + FIXED_HALF) >> FIXED_SHIFT
+            
+            yield f"шаг {step}: x={x}, y_floor={y}, остаток={rem}/{dx}"
+            yield f"  верхняя точка: ({x}, {y}), интенсивность: {255 - lower}"
+            yield f"  нижняя точка: ({x}, {y + 1}), интенсивность: {lower}"
+            
+            y += y_step
+            rem += rem_step
+            if rem >= dx:
+                rem -= dx
+                y += 1
     
-    log.append(f"Всего точек: {len(points)}")
-    return points, log
+    yield f"Всего точек: {2 + 2 * max(0, x1 - x0 - 1)}"
 
 def to_canvas_coords(x, y, scale, center_x, center_y):
     canvas_x = center_x + x * scale
@@ -264,7 +531,7 @@ class RasterApp:
             root, 
             width=700, 
             height=700,
-            bg="white",
+            bg=BACKGROUND_COLOR,
             highlightthickness=1,
             highlightbackground="#cccccc"
         )
@@ -272,6 +539,13 @@ class RasterApp:
         
         self.center_x = self.canvas_size // 2
         self.center_y = self.canvas_size // 2
+        self.view_width = int(self.canvas["width"])
+        self.view_height = int(self.canvas["height"])
+        
+        # rendered grids by scale and view, and the raster of the last drawing
+        self.grid_layers = {}
+        self.raster_layer = None
+        self.raster_view = None
         
         self.create_control_panel()
         
@@ -302,10 +576,15 @@ class RasterApp:
                 command=self.on_algorithm_change
             ).grid(row=1+i, column=0, sticky="w", pady=2)
         
-        ttk.Label(frm, text="Координаты:", font=("Arial", 11, "bold")).grid(row=6, column=0, sticky="w", pady=(15, 5))
+        self.fixed_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            frm, text="Целочисленные ЦДА и Ву (фикс. точка)", variable=self.fixed_var
+        ).grid(row=6, column=0, sticky="w", pady=(5, 2))
+        
+        ttk.Label(frm, text="Координаты:", font=("Arial", 11, "bold")).grid(row=7, column=0, sticky="w", pady=(15, 5))
         
         coord_frame = ttk.Frame(frm)
-        coord_frame.grid(row=7, column=0, sticky="w", pady=5)
+        coord_frame.grid(row=8, column=0, sticky="w", pady=5)
         
         ttk.Label(coord_frame, text="Начальная точка:").grid(row=0, column=0, columnspan=4, sticky="w")
         ttk.Label(coord_frame, text="x0:").grid(row=1, column=0, padx=(0, 2))
@@ -331,15 +610,15 @@ class RasterApp:
         self.y1_entry.insert(0, "6")
         
         btn_frame = ttk.Frame(frm)
-        btn_frame.grid(row=8, column=0, pady=10)
+        btn_frame.grid(row=9, column=0, pady=10)
         
         ttk.Button(btn_frame, text="Построить", command=self.on_draw).grid(row=0, column=0, padx=5)
         ttk.Button(btn_frame, text="Очистить", command=self.on_clear).grid(row=0, column=1, padx=5)
         
-        ttk.Label(frm, text="Масштаб:", font=("Arial", 11, "bold")).grid(row=9, column=0, sticky="w", pady=(15, 5))
+        ttk.Label(frm, text="Масштаб:", font=("Arial", 11, "bold")).grid(row=10, column=0, sticky="w", pady=(15, 5))
         
         scale_frame = ttk.Frame(frm)
-        scale_frame.grid(row=10, column=0, sticky="w", pady=5)
+        scale_frame.grid(row=11, column=0, sticky="w", pady=5)
         
         self.scale_var = tk.IntVar(value=self.scale)
         self.scale_slider = ttk.Scale(
@@ -357,12 +636,21 @@ class RasterApp:
         self.scale_label.grid(row=1, column=0, sticky="w")
         
         self.time_label = ttk.Label(frm, text="Время: ---", font=("Arial", 10))
-        self.time_label.grid(row=11, column=0, sticky="w", pady=(15, 5))
+        self.time_label.grid(row=12, column=0, sticky="w", pady=(15, 5))
+        
+        trace_frame = ttk.Frame(frm)
+        trace_frame.grid(row=13, column=0, sticky="w", pady=(15, 5))
         
-        ttk.Label(frm, text="Вычисления:", font=("Arial", 11, "bold")).grid(row=12, column=0, sticky="w", pady=(15, 5))
+        ttk.Label(trace_frame, text="Вычисления:", font=("Arial", 11, "bold")).grid(row=0, column=0, sticky="w")
+        self.trace_names = dict(TRACE_LEVELS)
+        self.trace_var = tk.StringVar(value=TRACE_LEVELS[-1][0])
+        ttk.Combobox(
+            trace_frame, textvariable=self.trace_var, values=[label for label, _ in TRACE_LEVELS],
+            state="readonly", width=14
+        ).grid(row=0, column=1, padx=(10, 0))
         
         log_frame = ttk.Frame(frm)
-        log_frame.grid(row=13, column=0, sticky="nsew", pady=5)
+        log_frame.grid(row=14, column=0, sticky="nsew", pady=5)
         
         self.log_text = tk.Text(log_frame, width=45, height=15, font=TEXT_FONT, wrap=tk.WORD)
         scrollbar = ttk.Scrollbar(log_frame, orient="vertical", command=self.log_text.yview)
@@ -374,89 +662,108 @@ class RasterApp:
         log_frame.columnconfigure(0, weight=1)
         log_frame.rowconfigure(0, weight=1)
         
-        frm.rowconfigure(13, weight=1)
+        frm.rowconfigure(14, weight=1)
 
     def on_canvas_resize(self, event):
-        self.center_x = event.width // 2
-        self.center_y = event.height // 2
-        self.draw_grid()
-        if self.last_points:
-            self.redraw_points()
+        self.view_width = event.width
+        self.view_height = event.height
+        dx = event.width // 2 - self.center_x
+        dy = event.height // 2 - self.center_y
+        self.center_x += dx
+        self.center_y += dy
+        self.update_scene(1, dx, dy)
 
     def on_scale_change(self, event=None):
         new_scale = int(round(self.scale_var.get()))
         if new_scale != self.scale:
+            factor = new_scale / self.scale
             self.scale = new_scale
             self.scale_label.config(text=f"{self.scale} px/ед")
-            self.draw_grid()
-            if self.last_points:
-                self.redraw_points()
+            self.update_scene(factor, 0, 0)
 
     def on_algorithm_change(self):
         self.clear_drawing()
 
     def draw_grid(self):
+        # The scene is built once; zoom and resize go through update_scene, which
+        # transforms the existing items instead of recreating them.
         self.canvas.delete("all")
         
         s = self.scale
         cx, cy = self.center_x, self.center_y
         gs = self.grid_size
         
-        for i in range(-gs, gs + 1):
-            x = cx + i * s
-            self.canvas.create_line(x, 0, x, self.canvas_size, fill=GRID_COLOR, tags="grid")
-            
-            y = cy + i * s
-            self.canvas.create_line(0, y, self.canvas_size, y, fill=GRID_COLOR, tags="grid")
-        
-        for i in range(-gs, gs + 1, 5):
-            if i == 0:
-                continue
-            x = cx + i * s
-            self.canvas.create_line(x, 0, x, self.canvas_size, fill=GRID_MAJOR_COLOR, tags="grid")
-            
-            y = cy + i * s
-            self.canvas.create_line(0, y, self.canvas_size, y, fill=GRID_MAJOR_COLOR, tags="grid")
-        
-        self.canvas.create_line(0, cy, self.canvas_size, cy, fill=AXIS_COLOR, width=2, tags="axis")
-        self.canvas.create_line(cx, 0, cx, self.canvas_size, fill=AXIS_COLOR, width=2, tags="axis")
+        self.grid_item = self.canvas.create_image(0, 0, image=self.grid_layer(), anchor="nw", tags="grid")
         
-        self.canvas.create_text(2 * cx - 10, cy - 10, text="X", font=("Arial", 12, "bold"), tags="axis")
-        self.canvas.create_text(cx - 10, 10, text="Y", font=("Arial", 12, "bold"), tags="axis")
+        self.axis_names = [
+            self.canvas.create_text(2 * cx - 10, cy - 10, text="X", font=("Arial", 12, "bold"), tags="axis"),
+            self.canvas.create_text(cx - 10, 10, text="Y", font=("Arial", 12, "bold"), tags="axis"),
+            self.canvas.create_text(cx + 12, cy + 12, text="0", font=("Arial", 9, "bold"), tags="axis")
+        ]
         
         for i in range(-gs, gs + 1, 2):
             if i != 0:
                 x = cx + i * s
-                self.canvas.create_text(x, cy + 10, text=str(i), font=("Arial", 8), tags="axis")
+                self.canvas.create_text(x, cy + 10, text=str(i), font=("Arial", 8), tags=("axis", "x_label"))
                 
                 y = cy + i * s
-                self.canvas.create_text(cx + 10, y, text=str(-i), font=("Arial", 8), tags="axis")
+                self.canvas.create_text(cx + 10, y, text=str(-i), font=("Arial", 8), tags=("axis", "y_label"))
         
-        self.canvas.create_text(cx + 12, cy + 12, text="0", font=("Arial", 9, "bold"), tags="axis")
+        self.info_item = self.canvas.create_text(10, 10, text=f"Масштаб: 1 ед = {s} px", 
+                                                 anchor="nw", font=("Arial", 9), tags="info")
         
-        self.canvas.create_text(10, 10, text=f"Масштаб: 1 ед = {s} px", 
-                               anchor="nw", font=("Arial", 9), tags="info")
+        self.raster_item = self.canvas.create_image(0, 0, anchor="nw", tags="raster")
 
-    def draw_raster_square(self, x, y, intensity=255):
-        canvas_x, canvas_y = to_canvas_coords(x, y, self.scale, self.center_x, self.center_y)
+    def update_scene(self, factor, dx, dy):
+        # A fixed number of canvas operations whatever the number of drawn pixels:
+        # the grid and raster images are swapped for ones rendered for the new view,
+        # the labels are moved and stretched as groups, and only the few highlight
+        # items are drawn again.
+        cx, cy = self.center_x, self.center_y
+        self.canvas.itemconfig(self.grid_item, image=self.grid_layer())
+        
+        self.canvas.move("x_label", dx, dy)
+        self.canvas.move("y_label", dx, dy)
+        if factor != 1:
+            self.canvas.scale("x_label", cx, 0, factor, 1)
+            self.canvas.scale("y_label", 0, cy, 1, factor)
         
-        pixel_size = self.scale - 1
-        half_pixel = pixel_size // 2
+        x_name, y_name, zero = self.axis_names
+        self.canvas.coords(x_name, 2 * cx - 10, cy - 10)
+        self.canvas.coords(y_name, cx - 10, 10)
+        self.canvas.coords(zero, cx + 12, cy + 12)
+        self.canvas.itemconfig(self.info_item, text=f"Масштаб: 1 ед = {self.scale} px")
         
-        if intensity < 255:
-            gray_value = 255 - intensity
-            color = f"#{gray_value:02x}{gray_value:02x}{gray_value:02x}"
-            self.canvas.create_rectangle(
-                canvas_x - half_pixel, canvas_y - half_pixel,
-                canvas_x + half_pixel, canvas_y + half_pixel,
-                fill=color, outline=color, tags="raster"
+        self.canvas.delete("point")
+        self.canvas.delete("ideal_line")
+        self.canvas.delete("coord_label")
+        self.redraw_points()
+
+    def grid_layer(self):
+        key = (self.scale, self.view_width, self.view_height, self.center_x, self.center_y)
+        if key not in self.grid_layers:
+            if len(self.grid_layers) >= GRID_CACHE_SIZE:
+                del self.grid_layers[next(iter(self.grid_layers))]
+            self.grid_layers[key] = grid_layer(
+                self.canvas, self.view_width, self.view_height, (self.center_x, self.center_y),
+                self.scale, self.grid_size, (BACKGROUND_COLOR, GRID_COLOR, GRID_MAJOR_COLOR), AXIS_COLOR
             )
+        return self.grid_layers[key]
+
+    def draw_raster(self):
+        if self.raster_layer is None:
+            self.raster_layer = RasterLayer(self.canvas, self.last_points, RASTER_COLOR)
+        
+        # the canvas keeps no reference to its image, so it is held here
+        self.raster_view = self.raster_layer.view(
+            self.scale, (self.center_x, self.center_y), (self.view_width, self.view_height)
+        )
+        if self.raster_view is None:
+            self.canvas.itemconfig(self.raster_item, image="")
         else:
-            self.canvas.create_rectangle(
-                canvas_x - half_pixel, canvas_y - half_pixel,
-                canvas_x + half_pixel, canvas_y + half_pixel,
-                fill=RASTER_COLOR, outline=RASTER_COLOR, tags="raster"
-            )
+            image, left, top = self.raster_view
+            self.canvas.coords(self.raster_item, left, top)
+            self.canvas.itemconfig(self.raster_item, image=image)
 
     def draw_point(self, x, y, color=POINT_COLOR, highlight=False):
         canvas_x, canvas_y = to_canvas_coords(x, y, self.scale, self.center_x, self.center_y)
@@ -513,18 +820,7 @@ class RasterApp:
             except:
                 pass
         
-        if algorithm == "wu_line":
-            for point in self.last_points:
-                x, y, intensity = point
-                self.draw_raster_square(x, y, intensity)
-        else:
-            for point in self.last_points:
-                if len(point) == 2:
-                    x, y = point
-                    self.draw_raster_square(x, y)
-                elif len(point) == 3:
-                    x, y, intensity = point
-                    self.draw_raster_square(x, y, intensity)
+        self.draw_raster()
         
         if algorithm != "bres_circle" and len(highlight_points) == 2:
             points_list = list(highlight_points)
@@ -541,8 +837,8 @@ class RasterApp:
         if isinstance(lines, str):
             self.log_text.insert("end", lines)
         else:
-            for line in lines:
-                self.log_text.insert("end", line + "\n")
+            # one insert call: a full trace of a long line is thousands of lines
+            self.log_text.insert("end", "".join(line + "\n" for line in lines))
         
         self.log_text.config(state="disabled")
         self.log_text.see("1.0") 
@@ -550,9 +846,11 @@ class RasterApp:
     def clear_drawing(self):
         self.canvas.delete("point")
         self.canvas.delete("ideal_line")
-        self.canvas.delete("raster")
+        self.canvas.itemconfig(self.raster_item, image="")
         self.canvas.delete("coord_label")
         self.last_points = []
+        self.raster_layer = None
+        self.raster_view = None
         self.log_text.config(state="normal")
         self.log_text.delete("1.0", "end")
         self.log_text.config(state="disabled")
@@ -560,7 +858,6 @@ class RasterApp:
 
     def on_clear(self):
         self.clear_drawing()
-        self.draw_grid()
 
     def on_draw(self):
         try:
@@ -576,18 +873,22 @@ class RasterApp:
         
         self.clear_drawing()
         
+        trace = self.trace_names[self.trace_var.get()]
+        mode = MODE_FIXED if self.fixed_var.get() else MODE_FLOAT
+        
+        # only the rasterization is timed: the log is a generator that runs after the clock stops
         start_time = time.perf_counter()
         
         if algorithm == "naive":
-            points, log = naive_line(x0, y0, x1, y1)
+            points, log = naive_line(x0, y0, x1, y1, trace)
         elif algorithm == "dda":
-            points, log = dda_line(x0, y0, x1, y1)
+            points, log = dda_line(x0, y0, x1, y1, trace, mode)
         elif algorithm == "bres_line":
-            points, log = bresenham_line(x0, y0, x1, y1)
+            points, log = bresenham_line(x0, y0, x1, y1, trace)
         elif algorithm == "bres_circle":
-            points, log = bresenham_circle(x0, y0, x1)
+            points, log = bresenham_circle(x0, y0, x1, trace)
         elif algorithm == "wu_line":
-            points, log = wu_line(x0, y0, x1, y1)
+            points, log = wu_line(x0, y0, x1, y1, trace, mode)
         else:
             points, log = [], ["Неизвестный алгоритм"]
         
@@ -595,6 +896,10 @@ class RasterApp:
         execution_time = (end_time - start_time) * 1000
         
         self.last_points = points
+        self.raster_layer = None
+        
+        if algorithm in ("dda", "wu_line") and mode == MODE_FIXED:
+            algorithm += " (фиксированная точка)"
         
         if algorithm != "bres_circle":
             header = [
@@ -615,7 +920,7 @@ class RasterApp:
                 "-" * 45
             ]
         
-        full_log = header + log
+        full_log = header + list(log)
         self.write_log(full_log)
         self.time_label.config(text=f"Время: {execution_time:.3f} мс")
         
@@ -0,0 +1,167 @@
+import argparse
+import csv
+import json
+import math
+import statistics
+import sys
+import time
+
+from Main import (TRACE_FULL, TRACE_OFF, TRACE_SUMMARY, bresenham_circle, bresenham_line, dda_line,
+                  dda_line_fixed, naive_line, wu_line, wu_line_fixed)
+
+LINE_ALGORITHMS = {
+    "naive": naive_line,
+    "dda": dda_line,
+    "dda_fixed": dda_line_fixed,
+    "bres_line": bresenham_line,
+    "wu_line": wu_line,
+    "wu_fixed": wu_line_fixed,
+}
+FIELDS = ["algorithm", "length", "slope", "radius", "trace", "pixels", "calls", "median_us", "p95_us", "pixels_per_s"]
+MIN_SAMPLE_TIME = 0.002
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(fraction * len(ordered)) - 1))]
+
+
+def measure(func, args, trace, repeat, warmup):
+    # Every sample runs the call enough times to take MIN_SAMPLE_TIME, so short lines
+    # are not lost in timer noise. With logging on, the log is read as the GUI reads it.
+    def call():
+        points, log = func(*args, trace)
+        if trace != TRACE_OFF:
+            for _ in log:
+                pass
+        return points
+
+    points = call()
+    start = time.perf_counter()
+    call()
+    single = time.perf_counter() - start
+    calls = max(1, math.ceil(MIN_SAMPLE_TIME / max(single, 1e-9)))
+
+    for _ in range(warmup):
+        call()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(calls):
+            call()
+        samples.append((time.perf_counter() - start) / calls)
+    return len(points), calls, samples
+
+
+def cases(args):
+    for name in args.algorithms:
+        if name == "bres_circle":
+            for radius in args.radii:
+                yield name, bresenham_circle, (0, 0, radius), {"radius": radius}
+            continue
+        for length in args.lengths:
+            for slope in args.slopes:
+                angle = math.radians(slope)
+                end = (round(length * math.cos(angle)), round(length * math.sin(angle)))
+                yield name, LINE_ALGORITHMS[name], (0, 0) + end, {"length": length, "slope": slope}
+
+
+def run(args):
+    results = []
+    for name, func, func_args, params in cases(args):
+        pixels, calls, samples = measure(func, func_args, args.trace, args.repeat, args.warmup)
+        median = statistics.median(samples)
+        results.append({
+            "algorithm": name,
+            "length": params.get("length", ""),
+            "slope": params.get("slope", ""),
+            "radius": params.get("radius", ""),
+            "trace": args.trace,
+            "pixels": pixels,
+            "calls": calls,
+            "median_us": median * 1e6,
+            "p95_us": percentile(samples, 0.95) * 1e6,
+            "pixels_per_s": pixels / median,
+        })
+    return results
+
+
+def result_key(row):
+    return tuple(str(row[field]) for field in ("algorithm", "length", "slope", "radius", "trace"))
+
+
+def load_baseline(path):
+    with open(path, encoding="utf-8") as f:
+        return {result_key(row): row for row in json.load(f)["results"]}
+
+
+def report(results, baseline, threshold):
+    regressions = 0
+    print(f"{'алгоритм':<12} {'случай':<22} {'пикс.':>6} {'медиана, мкс':>13} {'p95, мкс':>10} {'пикс./с':>12}"
+          + ("  к базе" if baseline is not None else ""))
+    for row in results:
+        case = f"r={row['radius']}" if row["algorithm"] == "bres_circle" else f"L={row['length']}, {row['slope']}°"
+        line = (f"{row['algorithm']:<12} {case:<22} {row['pixels']:>6} {row['median_us']:>13.2f} "
+                f"{row['p95_us']:>10.2f} {row['pixels_per_s']:>12.0f}")
+        if baseline is not None:
+            base = baseline.get(result_key(row))
+            if base is None:
+                line += "  нет в базе"
+            else:
+                ratio = row["median_us"] / base["median_us"]
+                slower = ratio > 1 + threshold
+                regressions += slower
+                line += f"  {ratio:>5.2f}x{' !' if slower else ''}"
+        print(line)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Замер алгоритмов растеризации без интерфейса")
+    parser.add_argument("-a", "--algorithms", nargs="+", choices=list(LINE_ALGORITHMS) + ["bres_circle"],
+                        default=list(LINE_ALGORITHMS) + ["bres_circle"], help="алгоритмы")
+    parser.add_argument("--lengths", type=int, nargs="+", default=[8, 64, 512, 4096], help="длины отрезков")
+    parser.add_argument("--slopes", type=float, nargs="+", default=[0, 22.5, 45, 67.5, 90],
+                        help="углы наклона отрезков в градусах")
+    parser.add_argument("--radii", type=int, nargs="+", default=[8, 64, 512, 4096], help="радиусы окружностей")
+    parser.add_argument("-r", "--repeat", type=int, default=25, help="число замеров на случай")
+    parser.add_argument("-w", "--warmup", type=int, default=3, help="прогревочные вызовы перед замерами")
+    parser.add_argument("--trace", choices=[TRACE_OFF, TRACE_SUMMARY, TRACE_FULL], default=TRACE_OFF,
+                        help="уровень журнала вычислений (по умолчанию без журнала)")
+    parser.add_argument("--json", metavar="FILE", help="сохранить результаты в JSON (годится как база)")
+    parser.add_argument("--csv", metavar="FILE", help="сохранить результаты в CSV")
+    parser.add_argument("--baseline", metavar="FILE", help="сравнить с сохранённым JSON")
+    parser.add_argument("--threshold", type=float, default=0.1,
+                        help="допустимое замедление относительно базы, доля (по умолчанию 0.1)")
+    args = parser.parse_args(argv)
+    if args.repeat < 1:
+        parser.error("--repeat должен быть не меньше 1")
+
+    baseline = None
+    if args.baseline:
+        try:
+            baseline = load_baseline(args.baseline)
+        except (OSError, ValueError, KeyError) as e:
+            parser.error(f"не удалось прочитать базу {args.baseline}: {e}")
+
+    results = run(args)
+    regressions = report(results, baseline, args.threshold)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"python": sys.version.split()[0], "repeat": args.repeat, "results": results},
+                      f, ensure_ascii=False, indent=1)
+    if args.csv:
+        with open(args.csv, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=FIELDS)
+            writer.writeheader()
+            writer.writerows(results)
+
+    if regressions:
+        print(f"Замедление больше {args.threshold:.0%} относительно базы: {regressions}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,109 @@
+import tkinter as tk
+
+MAJOR_EVERY = 5
+
+
+def pixel_color(intensity, color):
+    if intensity < 255:
+        gray = 255 - intensity
+        return f"#{gray:02x}{gray:02x}{gray:02x}"
+    return color
+
+
+def grid_tile(scale, phase_x, phase_y, colors, major_every=MAJOR_EVERY):
+    # One period of the grid as Tk image data, major lines over minor ones.
+    # phase_x and phase_y are the distances from the previous major line to the tile corner.
+    background, minor, major = colors
+    size = scale * major_every
+    column_colors = []
+    for x in range(size):
+        offset = (x + phase_x) % size
+        column_colors.append(major if offset == 0 else minor if offset % scale == 0 else background)
+
+    rows = []
+    for y in range(size):
+        offset = (y + phase_y) % size
+        if offset == 0:
+            row = [major] * size
+        elif offset % scale == 0:
+            row = [major if color == major else minor for color in column_colors]
+        else:
+            row = column_colors
+        rows.append("{" + " ".join(row) + "}")
+    return " ".join(rows)
+
+
+def grid_layer(master, width, height, center, scale, grid_size, colors, axis_color):
+    # The whole grid is one image: a single tiled put for the lines and two for the axes,
+    # instead of hundreds of canvas line items.
+    cx, cy = center
+    image = tk.PhotoImage(master=master, width=width, height=height)
+    image.put(colors[0], to=(0, 0, width, height))
+
+    extent = grid_size * scale
+    left, top = max(0, cx - extent), max(0, cy - extent)
+    right, bottom = min(width, cx + extent + 1), min(height, cy + extent + 1)
+    if left < right and top < bottom:
+        period = scale * MAJOR_EVERY
+        tile = grid_tile(scale, (left - cx) % period, (top - cy) % period, colors)
+        image.put(tile, to=(left, top, right, bottom))
+
+    # axes are two pixels wide, like a width=2 canvas line
+    if 0 < cy <= height:
+        image.put(axis_color, to=(0, cy - 1, width, min(cy + 1, height)))
+    if 0 < cx <= width:
+        image.put(axis_color, to=(cx - 1, 0, min(cx + 1, width), height))
+    return image
+
+
+def cell_runs(points):
+    # Horizontal runs of neighbouring cells, one Tk put each.
+    # points map (x, y) to a color; returns the bounding box and (row, column, data) runs.
+    xs = [x for x, _ in points]
+    ys = [y for _, y in points]
+    min_x, max_y = min(xs), max(ys)
+    width, height = max(xs) - min_x + 1, max_y - min(ys) + 1
+
+    runs = []
+    for y, x, color in sorted((y, x, color) for (x, y), color in points.items()):
+        if runs and runs[-1][0] == max_y - y and runs[-1][1] + len(runs[-1][2]) == x - min_x:
+            runs[-1][2].append(color)
+        else:
+            runs.append((max_y - y, x - min_x, [color]))
+    runs = [(row, column, "{" + " ".join(colors) + "}") for row, column, colors in runs]
+    return (min_x, max_y, width, height), runs
+
+
+class RasterLayer:
+    # Rasterized pixels as an image with one pixel per grid cell; unset cells stay
+    # transparent. The canvas shows a zoomed copy of the visible cells, so the cost of a
+    # redraw depends on the canvas size, not on how many pixels were rasterized.
+    def __init__(self, master, points, color):
+        cells = {}
+        for point in points:
+            # later pixels cover earlier ones, as they did with canvas rectangles
+            cells[point[0], point[1]] = pixel_color(point[2] if len(point) == 3 else 255, color)
+        self.master = master
+        self.box, runs = cell_runs(cells)
+        self.cells = tk.PhotoImage(master=master, width=self.box[2], height=self.box[3])
+        for row, column, data in runs:
+            self.cells.put(data, to=(column, row))
+
+    def view(self, scale, center, size):
+        # returns (image, left, top) of the visible part, or None when nothing is visible
+        min_x, max_y, width, height = self.box
+        cx, cy = center
+        x_low = max(min_x, -cx // scale - 1)
+        x_high = min(min_x + width - 1, (size[0] - cx) // scale + 1)
+        y_low = max(max_y - height + 1, (cy - size[1]) // scale - 1)
+        y_high = min(max_y, cy // scale + 1)
+        if x_low > x_high or y_low > y_high:
+            return None
+
+        image = tk.PhotoImage(master=self.master)
+        image.tk.call(image, "copy", self.cells,
+                      "-from", x_low - min_x, max_y - y_high, x_high - min_x + 1, max_y - y_low + 1,
+                      "-zoom", scale, scale)
+        # a cell is centred on its grid node, like the (scale - 1)-wide squares it replaces
+        half = (scale - 1) // 2
+        return image, cx + x_low * scale - half, cy - y_high * scale - half
@@ -0,0 +1,128 @@
+import argparse
+import itertools
+import math
+import random
+import sys
+from fractions import Fraction
+
+from Main import TRACE_OFF, dda_line, dda_line_fixed, wu_line, wu_line_fixed
+
+HALF = Fraction(1, 2)
+MAX_REPORTED = 5
+
+
+def dda_ideal(x0, y0, x1, y1):
+    # the DDA points as exact rationals, before rounding
+    dx, dy = x1 - x0, y1 - y0
+    steps = max(abs(dx), abs(dy))
+    if steps == 0:
+        return [(Fraction(x0), Fraction(y0))]
+    return [(x0 + Fraction(dx * i, steps), y0 + Fraction(dy * i, steps)) for i in range(steps + 1)]
+
+
+def wu_exact(x0, y0, x1, y1):
+    # Wu with intery kept as an exact rational and every intensity rounded from it
+    steep = abs(y1 - y0) > abs(x1 - x0)
+    if steep:
+        x0, y0, x1, y1 = y0, x0, y1, x1
+    if x0 > x1:
+        x0, y0, x1, y1 = x1, y1, x0, y0
+
+    points = [(x0, y0, 255), (x1, y1, 255)]
+    for x in range(x0 + 1, x1):
+        intery = y0 + Fraction((y1 - y0) * (x - x0), x1 - x0)
+        y = math.floor(intery)
+        frac = intery - y
+        points.append((x, y, round((1 - frac) * 255)))
+        points.append((x, y + 1, round(frac * 255)))
+    if steep:
+        points = [(y, x, intensity) for x, y, intensity in points]
+    return points
+
+
+def image(points):
+    return {(x, y): intensity for x, y, intensity in points if intensity}
+
+
+def segments(radius, count, length, seed):
+    yield from itertools.product(range(-radius, radius + 1), repeat=4)
+    rng = random.Random(seed)
+    for _ in range(count):
+        yield tuple(rng.randint(-length, length) for _ in range(4))
+
+
+def check(cases):
+    # Integer DDA and Wu must match exact arithmetic: DDA pixel for pixel, Wu by position
+    # with intensities within one level. The float versions may differ from them only
+    # where float summation misses an exact value: a DDA pixel moves only at a tie between
+    # two equally close pixels, and a Wu pixel moves only when it has zero intensity.
+    failures = []
+    stats = {"segments": 0, "dda_segments": 0, "dda_pixels": 0, "dda_total": 0,
+             "wu_segments": 0, "wu_pixels": 0, "wu_total": 0}
+
+    for segment in cases:
+        stats["segments"] += 1
+        ideal = dda_ideal(*segment)
+        exact = [(round(x), round(y)) for x, y in ideal]
+        if dda_line_fixed(*segment, TRACE_OFF)[0] != exact:
+            failures.append(f"ЦДА (фикс.) {segment}: расходится с точным расчётом")
+
+        moved = 0
+        for (x, y), (ix, iy), pixel in zip(ideal, exact, dda_line(*segment, TRACE_OFF)[0]):
+            if pixel != (ix, iy):
+                moved += 1
+                if abs(x - pixel[0]) > HALF or abs(y - pixel[1]) > HALF:
+                    failures.append(f"ЦДА {segment}: пиксель {pixel} не ближайший к ({x}, {y})")
+        stats["dda_segments"] += moved > 0
+        stats["dda_pixels"] += moved
+        stats["dda_total"] += len(exact)
+
+        fixed = wu_line_fixed(*segment, TRACE_OFF)[0]
+        exact = wu_exact(*segment)
+        if ([p[:2] for p in fixed] != [p[:2] for p in exact]
+                or any(abs(a[2] - b[2]) > 1 for a, b in zip(fixed, exact))):
+            failures.append(f"Ву (фикс.) {segment}: расходится с точным расчётом")
+
+        floating = wu_line(*segment, TRACE_OFF)[0]
+        moved = sum(a[:2] != b[:2] for a, b in zip(floating, fixed))
+        stats["wu_segments"] += moved > 0
+        stats["wu_pixels"] += moved
+        stats["wu_total"] += len(fixed)
+        # zero-intensity pixels are dropped, so only a visible change can fail here
+        float_image, fixed_image = image(floating), image(fixed)
+        for pixel in float_image.keys() | fixed_image.keys():
+            if abs(float_image.get(pixel, 0) - fixed_image.get(pixel, 0)) > 1:
+                failures.append(f"Ву {segment}: пиксель {pixel} отличается яркостью больше чем на 1")
+                break
+
+    return failures, stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Проверка целочисленных ЦДА и Ву против точного расчёта")
+    parser.add_argument("--radius", type=int, default=5,
+                        help="перебрать все отрезки с концами в [-radius, radius] (по умолчанию 5)")
+    parser.add_argument("--random", type=int, default=2000, help="число случайных отрезков")
+    parser.add_argument("--length", type=int, default=60, help="предел координат случайных отрезков")
+    parser.add_argument("--seed", type=int, default=0, help="зерно генератора случайных отрезков")
+    args = parser.parse_args(argv)
+
+    failures, stats = check(segments(args.radius, args.random, args.length, args.seed))
+    total = stats["segments"]
+    print(f"Отрезков: {total}; фиксированная точка совпадает с точным расчётом"
+          + ("" if not failures else " не везде"))
+    print(f"ЦДА с плавающей точкой: другие пиксели в {stats['dda_segments'] / total:.1%} отрезков "
+          f"({stats['dda_pixels'] / stats['dda_total']:.2%} пикселей), только в серединах между пикселями")
+    print(f"Ву с плавающей точкой: другие пиксели в {stats['wu_segments'] / total:.1%} отрезков "
+          f"({stats['wu_pixels'] / stats['wu_total']:.2%} пикселей), только нулевой яркости")
+
+    if failures:
+        for message in failures[:MAX_REPORTED]:
+            print(message, file=sys.stderr)
+        print(f"Нарушений: {len(failures)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
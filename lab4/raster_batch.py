@@ -0,0 +1,285 @@
+from collections import namedtuple
+
+import numpy as np
+
+ACCUMULATE_ROWS = 4096
+
+# Pixels of many primitives in flat arrays: primitive i owns x[offsets[i]:offsets[i + 1]].
+# intensity is None for algorithms that only set pixels (everything except Wu).
+RasterBatch = namedtuple("RasterBatch", "x y intensity offsets")
+
+
+def _as_rows(values, columns, name):
+    values = np.asarray(values)
+    if values.ndim == 1:
+        values = values.reshape(1, -1)
+    if values.ndim != 2 or values.shape[1] != columns:
+        raise ValueError(f"{name}: ожидается массив (N, {columns}), получено {values.shape}")
+    return values
+
+
+def _segments(segments):
+    segments = _as_rows(segments, 4, "Отрезки")
+    if segments.dtype.kind not in "iu":
+        rounded = np.round(segments)
+        if not np.array_equal(rounded, segments):
+            raise ValueError("Координаты отрезков должны быть целыми")
+        segments = rounded
+    return [segments[:, i].astype(np.int64) for i in range(4)]
+
+
+def _offsets(lengths):
+    offsets = np.zeros(len(lengths) + 1, dtype=np.intp)
+    np.cumsum(lengths, out=offsets[1:])
+    return offsets
+
+
+def _ranges(lengths):
+    # owner and step number of every pixel, as if each primitive ran its own loop
+    offsets = _offsets(lengths)
+    owner = np.repeat(np.arange(len(lengths)), lengths)
+    step = np.arange(offsets[-1]) - offsets[owner]
+    return owner, step, offsets
+
+
+def _accumulate(start, increment, lengths):
+    # The scalar code does `value += increment` on every step. A cumulative sum along
+    # rows adds in the same order, so the floats match it bit for bit, unlike
+    # start + step * increment. Rows are sorted by length to keep the padding small.
+    owner, step, offsets = _ranges(lengths)
+    result = np.empty(offsets[-1])
+    order = np.argsort(lengths, kind="stable")
+    for begin in range(0, len(order), ACCUMULATE_ROWS):
+        rows = order[begin:begin + ACCUMULATE_ROWS]
+        rows = rows[lengths[rows] > 0]
+        if not len(rows):
+            continue
+        width = int(lengths[rows].max())
+        table = np.empty((len(rows), width))
+        table[:, 0] = start[rows]
+        table[:, 1:] = increment[rows, None]
+        np.cumsum(table, axis=1, out=table)
+        inside = np.arange(width) < lengths[rows, None]
+        row_owner, row_step, _ = _ranges(lengths[rows])
+        result[offsets[rows][row_owner] + row_step] = table[inside]
+    return result
+
+
+def naive_lines(segments):
+    x0, y0, x1, y1 = _segments(segments)
+    dx, dy = x1 - x0, y1 - y0
+    vertical = dx == 0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        k = np.where(vertical, 0.0, dy / np.where(vertical, 1, dx))
+    b = y0 - k * x0
+    along_x = ~vertical & (np.abs(k) <= 1)
+
+    lengths = np.where(along_x, np.abs(dx), np.abs(dy)) + 1
+    owner, step, offsets = _ranges(lengths)
+    x_step = np.where(x1 > x0, 1, -1)[owner]
+    y_step = np.where(y1 > y0, 1, -1)[owner]
+    on_x = along_x[owner]
+
+    x = np.where(on_x, x0[owner] + x_step * step, 0)
+    y = np.where(on_x, 0, y0[owner] + y_step * step)
+    ko, bo = k[owner], b[owner]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # same expressions as the scalar code: y = kx + b or x = (y - b) / k, then round half to even
+        y = np.where(on_x, np.round(ko * x + bo), y)
+        x = np.where(on_x, x, np.where(vertical[owner], x0[owner], np.round((y - bo) / ko)))
+    return RasterBatch(x.astype(np.int64), y.astype(np.int64), None, offsets)
+
+
+def dda_lines(segments):
+    x0, y0, x1, y1 = _segments(segments)
+    dx, dy = x1 - x0, y1 - y0
+    steps = np.maximum(np.abs(dx), np.abs(dy))
+    safe = np.maximum(steps, 1)
+    lengths = steps + 1
+    x = _accumulate(x0.astype(np.float64), np.where(steps > 0, dx / safe, 0.0), lengths)
+    y = _accumulate(y0.astype(np.float64), np.where(steps > 0, dy / safe, 0.0), lengths)
+    return RasterBatch(np.round(x).astype(np.int64), np.round(y).astype(np.int64), None, _offsets(lengths))
+
+
+def bresenham_lines(segments):
+    # Closed form of the error-term loop: after i steps along the major axis the
+    # minor axis has moved floor((2 * i * minor + major - 1) / (2 * major)) pixels
+    x0, y0, x1, y1 = _segments(segments)
+    dx, dy = np.abs(x1 - x0), np.abs(y1 - y0)
+    sx = np.where(x0 < x1, 1, -1)
+    sy = np.where(y0 < y1, 1, -1)
+    major = np.maximum(dx, dy)
+    minor = np.minimum(dx, dy)
+
+    owner, step, offsets = _ranges(major + 1)
+    major_o = major[owner]
+    shift = np.maximum(2 * step * minor[owner] + major_o - 1, 0) // np.maximum(2 * major_o, 1)
+    x_major = (dx >= dy)[owner]
+    x = x0[owner] + sx[owner] * np.where(x_major, step, shift)
+    y = y0[owner] + sy[owner] * np.where(x_major, shift, step)
+    return RasterBatch(x, y, None, offsets)
+
+
+def wu_lines(segments):
+    x0, y0, x1, y1 = (v.astype(np.float64) for v in _segments(segments))
+    dx, dy = x1 - x0, y1 - y0
+    steep = np.abs(dy) > np.abs(dx)
+    x0, y0 = np.where(steep, y0, x0), np.where(steep, x0, y0)
+    x1, y1 = np.where(steep, y1, x1), np.where(steep, x1, y1)
+    dx, dy = np.where(steep, dy, dx), np.where(steep, dx, dy)
+    swap = x0 > x1
+    x0, x1 = np.where(swap, x1, x0), np.where(swap, x0, x1)
+    y0, y1 = np.where(swap, y1, y0), np.where(swap, y0, y1)
+    dx, dy = np.where(swap, -dx, dx), np.where(swap, -dy, dy)
+    gradient = np.where(dx != 0, dy / np.where(dx != 0, dx, 1), 0.0)
+
+    # endpoints first, then an upper and a lower pixel for every x strictly between them
+    inner = np.maximum(np.round(x1) - np.round(x0) - 1, 0).astype(np.intp)
+    lengths = 2 + 2 * inner
+    offsets = _offsets(lengths)
+    total = offsets[-1]
+    u = np.empty(total, dtype=np.int64)
+    v = np.empty(total, dtype=np.int64)
+    intensity = np.empty(total, dtype=np.int64)
+
+    u[offsets[:-1]], v[offsets[:-1]] = np.round(x0), np.round(y0)
+    u[offsets[:-1] + 1], v[offsets[:-1] + 1] = np.round(x1), np.round(y1)
+    intensity[offsets[:-1]] = intensity[offsets[:-1] + 1] = 255
+
+    intery = _accumulate(y0 + gradient * (np.round(x0) + 1 - x0), gradient, inner)
+    owner, step, _ = _ranges(inner)
+    floor = np.floor(intery)
+    frac = intery - floor
+    upper = offsets[owner] + 2 + 2 * step
+    u[upper] = u[upper + 1] = np.round(x0)[owner] + 1 + step
+    v[upper], v[upper + 1] = floor, floor + 1
+    intensity[upper] = np.round((1 - frac) * 255)
+    intensity[upper + 1] = np.round(frac * 255)
+
+    flip = np.repeat(steep, lengths)
+    return RasterBatch(np.where(flip, v, u), np.where(flip, u, v), intensity, offsets)
+
+
+def _octant_keep(x, y):
+    # Octant points of a step in the scalar order (x, y), (-x, y), (x, -y), (-x, -y),
+    # (y, x), (-y, x), (y, -x), (-y, -x). They only coincide on the axes (x == 0),
+    # on the diagonals (x == y) and for r == 0, so the repeats are known in advance.
+    keep = np.ones((len(x), 8), dtype=bool)
+    axis = x == 0
+    keep[axis, 1] = keep[axis, 3] = keep[axis, 6] = keep[axis, 7] = False
+    keep[x == y, 4:] = False
+    keep[axis & (y == 0), 1:] = False
+    return keep
+
+
+def bresenham_circles(circles):
+    circles = _as_rows(circles, 3, "Окружности").astype(np.int64)
+    xc, yc = circles[:, 0], circles[:, 1]
+    count = len(circles)
+    if not count:
+        empty = np.empty(0, dtype=np.int64)
+        return RasterBatch(empty, empty, None, _offsets(empty))
+    # the decision variable depends on the previous step, so the loop runs over steps
+    # while every operation inside it covers all circles at once
+    x = np.zeros(count, dtype=np.int64)
+    y = np.abs(circles[:, 2])
+    d = 3 - 2 * y
+    steps_x, steps_y, steps_owner = [], [], []
+    active = np.arange(count)
+    while len(active):
+        steps_x.append(x[active].copy())
+        steps_y.append(y[active].copy())
+        steps_owner.append(active)
+        xa, ya, da = x[active], y[active], d[active]
+        outside = da >= 0
+        d[active] = np.where(outside, da + 4 * (xa - ya) + 10, da + 4 * xa + 6)
+        y[active] = ya - outside
+        x[active] = xa + 1
+        active = active[x[active] <= y[active]]
+
+    owner = np.concatenate(steps_owner)
+    sx, sy = np.concatenate(steps_x), np.concatenate(steps_y)
+    # primitive-major order: each circle's steps in sequence, eight octant points per step
+    order = np.argsort(owner, kind="stable")
+    owner, sx, sy = owner[order], sx[order], sy[order]
+    px = np.stack([sx, -sx, sx, -sx, sy, -sy, sy, -sy], axis=1) + xc[owner, None]
+    py = np.stack([sy, sy, -sy, -sy, sx, sx, -sx, -sx], axis=1) + yc[owner, None]
+
+    keep = _octant_keep(sx, sy)
+    lengths = np.bincount(owner, weights=keep.sum(axis=1), minlength=count).astype(np.intp)
+    return RasterBatch(px[keep], py[keep], None, _offsets(lengths))
+
+
+def circle_octant(radius):
+    # The decision loop of bresenham_circle for one octant, x = 0, 1, ... while x <= y.
+    # It is inherently sequential, and time and memory grow linearly with the radius.
+    y = abs(int(radius))
+    d = 3 - 2 * y
+    x = 0
+    ys = []
+    while x <= y:
+        ys.append(y)
+        if d < 0:
+            d += 4 * x + 6
+        else:
+            d += 4 * (x - y) + 10
+            y -= 1
+        x += 1
+    return np.arange(len(ys), dtype=np.int64), np.array(ys, dtype=np.int64)
+
+
+def _perimeter(x, y):
+    # Counter-clockwise from (r, 0). Odd octants run along the octant arc and even ones
+    # back along it; the first point of each octant is dropped when it repeats the last
+    # point of the previous one (an axis or a diagonal point).
+    if x[-1] == y[-1]:
+        xr, yr = x[-2::-1], y[-2::-1]
+    else:
+        xr, yr = x[::-1], y[::-1]
+    px = np.concatenate([y, xr, -x[1:], -yr, -y[1:], -xr, x[1:], yr[:-1]])
+    py = np.concatenate([x, yr, y[1:], xr, -x[1:], -yr, -y[1:], -xr[:-1]])
+    return px, py
+
+
+def circle_points(xc, yc, radius, ordered=False):
+    # Every pixel of the Bresenham circle once, as arrays x and y. By default in the
+    # order of bresenham_circle, with ordered=True as a walk along the perimeter.
+    x, y = circle_octant(radius)
+    if not y[0]:
+        return np.array([xc], dtype=np.int64), np.array([yc], dtype=np.int64)
+    if ordered:
+        px, py = _perimeter(x, y)
+    else:
+        keep = _octant_keep(x, y)
+        px = np.stack([x, -x, x, -x, y, -y, y, -y], axis=1)[keep]
+        py = np.stack([y, y, -y, -y, x, x, -x, -x], axis=1)[keep]
+    return px + xc, py + yc
+
+
+LINE_ALGORITHMS = {
+    "naive": naive_lines,
+    "dda": dda_lines,
+    "bres_line": bresenham_lines,
+    "wu_line": wu_lines,
+}
+
+
+def primitive_points(batch, index):
+    start, end = batch.offsets[index], batch.offsets[index + 1]
+    if batch.intensity is None:
+        return list(zip(batch.x[start:end].tolist(), batch.y[start:end].tolist()))
+    return list(zip(batch.x[start:end].tolist(), batch.y[start:end].tolist(),
+                    batch.intensity[start:end].tolist()))
+
+
+def rasterize(batch, width, height, origin=(0, 0), framebuffer=None):
+    # origin is the framebuffer cell of the point (0, 0); y grows upwards like on the grid
+    if framebuffer is None:
+        framebuffer = np.zeros((height, width), dtype=np.uint8)
+    column = batch.x + origin[0]
+    row = origin[1] - batch.y
+    inside = (column >= 0) & (column < width) & (row >= 0) & (row < height)
+    values = batch.intensity[inside] if batch.intensity is not None else 255
+    # overlapping pixels keep the strongest intensity
+    np.maximum.at(framebuffer, (row[inside], column[inside]), np.asarray(values, dtype=np.uint8))
+    return framebuffer